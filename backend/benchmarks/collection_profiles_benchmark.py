@@ -0,0 +1,138 @@
+"""
+Compare the collection profiles of vectorstore/collection_profiles.py on a running Qdrant server:
+recall@k against an exact full-precision search, query latency and estimated RAM.
+
+Quantization and HNSW settings are ignored by the in-memory client, so a real server is required.
+Run from the backend directory:
+
+    python -m benchmarks.collection_profiles_benchmark --vectors 20000 --profiles default balanced compact
+    python -m benchmarks.collection_profiles_benchmark --source-collection "Titre, Artiste"
+"""
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+import numpy as np
+import argparse
+import json
+import time
+
+from vectorstore.collection_profiles import COLLECTION_PROFILES, CollectionProfile
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    # Vecteurs regroupés en clusters, plus proches de vrais embeddings qu'un bruit uniforme
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=count)
+    return normalize(centers[labels] + 0.5 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def load_collection_vectors(client: QdrantClient, collection_name: str) -> np.ndarray:
+    vectors = []
+    next_offset = None
+    while True:
+        points, next_offset = client.scroll(collection_name=collection_name, offset=next_offset, limit=1000,
+                                            with_payload=False, with_vectors=True)
+        vectors.extend(point.vector for point in points)
+        if not next_offset:
+            return normalize(np.array(vectors, dtype=np.float32))
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.integers(0, len(vectors), size=count)]
+    return normalize(picked + 0.3 * rng.normal(size=picked.shape) / np.sqrt(vectors.shape[1])).astype(np.float32)
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    # Recherche exacte en float32 (cosinus = produit scalaire sur des vecteurs normalisés)
+    scores = queries @ vectors.T
+    return [set(np.argpartition(-row, k)[:k].tolist()) for row in scores]
+
+
+def load_profile_collection(client: QdrantClient, collection_name: str, profile: CollectionProfile,
+                            vectors: np.ndarray, timeout: float = 600):
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=profile.vectors_config(vectors.shape[1]),
+        **profile.collection_kwargs(),
+    )
+    client.upload_collection(collection_name=collection_name, vectors=vectors, ids=list(range(len(vectors))),
+                             batch_size=256, wait=True)
+    # Attend la fin de la construction du graphe HNSW et des vecteurs quantifiés
+    deadline = time.monotonic() + timeout
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Collection '{collection_name}' still indexing after {timeout}s")
+        time.sleep(1)
+
+
+def benchmark_profile(client: QdrantClient, collection_name: str, profile: CollectionProfile,
+                      queries: np.ndarray, expected: list, k: int) -> dict:
+    latencies = []
+    recalls = []
+    search_params = profile.search_params()
+    for query, expected_ids in zip(queries, expected):
+        start = time.perf_counter()
+        response = client.query_points(collection_name=collection_name, query=query.tolist(), limit=k,
+                                       search_params=search_params, with_payload=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({point.id for point in response.points} & expected_ids) / k)
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+        "latency_ms_mean": round(float(np.mean(latencies)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Qdrant collection profiles (recall, latency, RAM).")
+    parser.add_argument("--url", default="http://localhost:6333/")
+    parser.add_argument("--profiles", nargs="*", default=list(COLLECTION_PROFILES))
+    parser.add_argument("--source-collection", default=None, help="Benchmark on the vectors of an existing collection")
+    parser.add_argument("--vectors", type=int, default=20000, help="Number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1024, help="Synthetic vector size (Solon-embeddings-large: 1024)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=6)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url, prefer_grpc=True)
+    if args.source_collection:
+        vectors = load_collection_vectors(client, args.source_collection)
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dim)
+    queries = make_queries(vectors, args.queries)
+    expected = exact_neighbors(vectors, queries, args.k)
+    print(f"{len(vectors)} vecteurs de dimension {vectors.shape[1]}, {len(queries)} requêtes, k={args.k}")
+
+    results = {}
+    for profile_name in args.profiles:
+        profile = COLLECTION_PROFILES[profile_name]
+        collection_name = f"benchmark_{profile_name}"
+        start = time.perf_counter()
+        load_profile_collection(client, collection_name, profile, vectors)
+        results[profile_name] = {
+            "index_seconds": round(time.perf_counter() - start, 2),
+            **benchmark_profile(client, collection_name, profile, queries, expected, args.k),
+            "estimated_ram_mb": round(profile.estimate_ram_bytes(len(vectors), vectors.shape[1]) / 2 ** 20, 1),
+        }
+        print(f"{profile_name:>10} : {results[profile_name]}")
+        if not args.keep:
+            client.delete_collection(collection_name)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"vectors": len(vectors), "dim": int(vectors.shape[1]), "queries": len(queries), "k": args.k,
+                       "profiles": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
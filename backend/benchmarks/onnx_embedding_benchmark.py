@@ -0,0 +1,121 @@
+"""
+Parity and throughput check of the ONNX Runtime embedding backend against PyTorch.
+
+Embeds the same texts with HuggingFaceEmbeddings and OnnxEmbeddings, reports the cosine similarity
+between both (min / mean / p1), document throughput and single query latency for each backend.
+Exits with status 1 when the minimum cosine is below --min-cosine, so it can gate a deployment.
+Run from the backend directory:
+
+    python -m benchmarks.onnx_embedding_benchmark --pdf-path ./data/pdfs --texts 256
+"""
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import List
+import numpy as np
+import argparse
+import resource
+import json
+import time
+import sys
+
+from embedding.onnx_embeddings import OnnxEmbeddings
+
+
+SAMPLE_TEXTS = [
+    "Quel est le sujet de ce tableau ?",
+    "Qui a peint La Bataille de Taillebourg et en quelle année ?",
+    "Le tableau représente Saint Louis à cheval au milieu de la mêlée sur le pont de Taillebourg.",
+    "Delacroix reçoit la commande de Louis-Philippe pour la galerie des Batailles du château de Versailles.",
+    "La composition met en avant le mouvement et la couleur plutôt que le dessin, à l'opposé du néoclassicisme.",
+    "Pourquoi l'artiste a-t-il choisi des couleurs aussi vives pour les étendards ?",
+    "Les musées partenaires prêtent leurs oeuvres pour des expositions temporaires.",
+    "What technique did the painter use for the sky?",
+]
+
+
+def load_texts(pdf_path: str, count: int) -> List[str]:
+    if not pdf_path:
+        return (SAMPLE_TEXTS * (count // len(SAMPLE_TEXTS) + 1))[:count]
+    from chunking.chunking_service import ChunkingService
+    texts = []
+    for doc in ChunkingService().iter_chunked_documents(path=pdf_path):
+        texts.append(doc.page_content)
+        if len(texts) == count:
+            break
+    return texts
+
+
+def cosine_similarities(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(embeddings, texts: List[str], queries: int) -> tuple:
+    embeddings.embed_documents(texts[:4])
+    start = time.perf_counter()
+    vectors = np.array(embeddings.embed_documents(texts))
+    documents_seconds = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        embeddings.embed_query(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return vectors, {
+        "documents_per_second": round(len(texts) / documents_seconds, 2),
+        "query_latency_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "query_latency_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ONNX Runtime embedding backend with PyTorch.")
+    parser.add_argument("--model-name", default="OrdalieTech/Solon-embeddings-large-0.1")
+    parser.add_argument("--pdf-path", default=None, help="Embed chunks of these PDFs instead of built-in sentences")
+    parser.add_argument("--texts", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--onnx-cache-path", default="./data/embedding/onnx/")
+    parser.add_argument("--no-quantize", action="store_true", help="Compare the fp32 ONNX export instead of int8")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    texts = load_texts(args.pdf_path, args.texts)
+    results = {"model_name": args.model_name, "texts": len(texts)}
+
+    # ONNX d'abord : le pic de RSS mesuré ensuite inclut les deux modèles
+    start = time.perf_counter()
+    onnx_embeddings = OnnxEmbeddings(model_name=args.model_name, cache_dir=args.onnx_cache_path,
+                                     quantize=not args.no_quantize)
+    results["onnx_load_seconds"] = round(time.perf_counter() - start, 2)
+    onnx_vectors, results["onnx"] = measure(onnx_embeddings, texts, args.queries)
+    results["onnx"]["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    start = time.perf_counter()
+    torch_embeddings = HuggingFaceEmbeddings(model_name=args.model_name)
+    results["torch_load_seconds"] = round(time.perf_counter() - start, 2)
+    torch_vectors, results["torch"] = measure(torch_embeddings, texts, args.queries)
+    results["torch"]["peak_rss_mb_with_onnx"] = round(peak_rss_mb(), 1)
+
+    similarities = cosine_similarities(onnx_vectors, torch_vectors)
+    results["cosine"] = {
+        "min": round(float(similarities.min()), 5),
+        "p1": round(float(np.percentile(similarities, 1)), 5),
+        "mean": round(float(similarities.mean()), 5),
+    }
+    results["speedup"] = round(results["onnx"]["documents_per_second"] / results["torch"]["documents_per_second"], 2)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if results["cosine"]["min"] < args.min_cosine:
+        print(f"Parité insuffisante : cosinus min {results['cosine']['min']} < {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,569 @@
+"""
+End-to-end load benchmark of the FastAPI app (main.create_app) with local stand-ins, no network needed:
+a fake streaming Gemini model with configurable latencies, an in-memory Qdrant (QdrantClient(":memory:"))
+seeded from the PDFs under --data-path, and an in-memory Firestore.
+
+The app is served by uvicorn on the loopback interface in a child process, so the load generator does not
+share the server's GIL. /gemini/generate_rag is driven at the given concurrency; the report gives p50/p95/p99
+time to first byte (first streamed chunk) and full response latency, throughput, and the mean duration of each
+RAG stage read from /metrics. Results are written to JSON with the current commit, and --baseline compares them
+with a previous run. Run from the backend directory:
+
+    python -m benchmarks.serving_benchmark --concurrency 16 --requests 400 --output serving.json
+    python -m benchmarks.serving_benchmark --embeddings fake --synthetic-documents 200 --baseline serving.json
+"""
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import multiprocessing
+import subprocess
+import itertools
+import argparse
+import asyncio
+import logging
+import socket
+import json
+import time
+import uuid
+import sys
+import os
+import re
+
+import numpy as np
+import httpx
+
+
+QUERIES = [
+    "Quel est le sujet de cette oeuvre ?",
+    "Qui est l'artiste et quel est son parcours ?",
+    "Quelle technique a été utilisée ?",
+    "Dans quel contexte l'oeuvre a-t-elle été exposée ?",
+    "Que signifient les couleurs choisies ?",
+    "Peux-tu me raconter l'histoire de cette oeuvre en quelques phrases ?",
+    "Quel lien y a-t-il entre le poème et l'exposition ?",
+    "Comment s'est passé le vernissage ?",
+]
+
+# Métriques comparées avec --baseline : (chemin dans les résultats, True si une valeur plus haute est meilleure)
+COMPARED_METRICS = [
+    (("ttfb_ms", "p50"), False),
+    (("ttfb_ms", "p95"), False),
+    (("ttfb_ms", "p99"), False),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("throughput_rps",), True),
+]
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel: streams `tokens` words in chunks of `tokens_per_chunk`, the first one
+    after `first_token_latency_ms`, then one every `token_latency_ms` per token. Responses have the shape read by
+    GeminiService.iter_response_texts and candidates_token_count.
+    """
+    def __init__(self, tokens: int = 200, tokens_per_chunk: int = 5, first_token_latency_ms: float = 300.0,
+                 token_latency_ms: float = 20.0) -> None:
+        self.tokens = tokens
+        self.tokens_per_chunk = tokens_per_chunk
+        self.first_token_latency = first_token_latency_ms / 1000
+        self.token_latency = token_latency_ms / 1000
+
+    @staticmethod
+    def response(text: str, generated_tokens: int) -> SimpleNamespace:
+        part = SimpleNamespace(text=text)
+        candidate = SimpleNamespace(content=SimpleNamespace(parts=[part]))
+        return SimpleNamespace(_result=SimpleNamespace(candidates=[candidate]),
+                               usage_metadata=SimpleNamespace(candidates_token_count=generated_tokens))
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        # Comme le vrai client, l'appel rend la main à l'arrivée du premier morceau
+        await asyncio.sleep(self.first_token_latency)
+        if not stream:
+            return self.response("mot " * self.tokens, self.tokens)
+        return self.stream()
+
+    async def stream(self):
+        generated = 0
+        while generated < self.tokens:
+            if generated:
+                await asyncio.sleep(self.token_latency * self.tokens_per_chunk)
+            chunk_tokens = min(self.tokens_per_chunk, self.tokens - generated)
+            generated += chunk_tokens
+            yield self.response("mot " * chunk_tokens, generated)
+
+    def count_tokens(self, contents) -> SimpleNamespace:
+        return SimpleNamespace(total_tokens=len(str(contents)) // 4)
+
+
+class FakeSnapshot:
+    def __init__(self, id: str, data: Optional[dict]) -> None:
+        self.id = id
+        self.exists = data is not None
+        self.data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return dict(self.data) if self.data is not None else None
+
+
+class FakeDocumentReference:
+    def __init__(self, db: "FakeFirestore", collection: str, id: str) -> None:
+        self.db = db
+        self.collection = collection
+        self.id = id
+
+    def get(self) -> FakeSnapshot:
+        self.db.wait()
+        return FakeSnapshot(self.id, self.db.documents[self.collection].get(self.id))
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        documents = self.db.documents[self.collection]
+        change_type = "MODIFIED" if self.id in documents else "ADDED"
+        documents[self.id] = {**documents.get(self.id, {}), **data} if merge else dict(data)
+        self.db.notify(self.collection, [SimpleNamespace(type=change_type,
+                                                         document=FakeSnapshot(self.id, documents[self.id]))])
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeFirestore", collection: str, field: str, value) -> None:
+        self.db = db
+        self.collection = collection
+        self.field = field
+        self.value = value
+        self.max_results = None
+
+    def limit(self, count: int) -> "FakeQuery":
+        self.max_results = count
+        return self
+
+    def get(self) -> List[FakeSnapshot]:
+        self.db.wait()
+        matches = [FakeSnapshot(id, data) for id, data in self.db.documents[self.collection].items()
+                   if self.field is None or data.get(self.field) == self.value]
+        return matches[:self.max_results]
+
+
+class FakeCollection:
+    def __init__(self, db: "FakeFirestore", name: str) -> None:
+        self.db = db
+        self.name = name
+
+    def document(self, id: str = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self.db, self.name, id or uuid.uuid4().hex)
+
+    def where(self, field: str, op: str, value) -> FakeQuery:
+        if op != "==":
+            raise NotImplementedError(f"Unsupported operator {op}")
+        return FakeQuery(self.db, self.name, field, value)
+
+    def limit(self, count: int) -> FakeQuery:
+        return FakeQuery(self.db, self.name, None, None).limit(count)
+
+    def on_snapshot(self, callback):
+        # Comme Firestore : un premier snapshot avec l'état courant, puis un par écriture (appelés ici en synchrone)
+        listener = (self.name, callback)
+        self.db.listeners.append(listener)
+        callback(None, [SimpleNamespace(type="ADDED", document=FakeSnapshot(id, data))
+                        for id, data in self.db.documents[self.name].items()], None)
+        return SimpleNamespace(unsubscribe=lambda: self.db.listeners.remove(listener))
+
+
+class FakeFirestore:
+    """
+    In-memory stand-in for firestore.Client, limited to the calls made by GeminiService and JobService.
+    Every read sleeps `latency_ms` (blocking, like the real client) to account for the network round trip.
+    """
+    def __init__(self, latency_ms: float = 30.0) -> None:
+        self.latency = latency_ms / 1000
+        self.documents: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self.listeners = []
+
+    def wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def notify(self, collection: str, changes: list) -> None:
+        for name, callback in list(self.listeners):
+            if name == collection:
+                callback(None, changes, None)
+
+
+class FakeEmbeddingService:
+    """
+    Deterministic hash-based embeddings: measures serving overhead without the cost of the embedding model.
+    """
+    def __init__(self, size: int = 1024) -> None:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        self.embeddings_model = DeterministicFakeEmbedding(size=size)
+        self.query_embedder = self.embeddings_model
+
+
+def find_artwork_directories(data_path: str) -> List[str]:
+    directories = []
+    for root, _, files in os.walk(data_path):
+        if any(file.endswith(".pdf") for file in files):
+            directories.append(root)
+    return sorted(directories)
+
+
+def synthetic_documents(artwork, count: int) -> list:
+    from langchain.schema.document import Document
+    sentences = [
+        f"{artwork.title} est une oeuvre de {artwork.artist.name}.",
+        "La composition joue sur les contrastes de lumière et de couleur.",
+        "L'oeuvre a été présentée lors d'une exposition accompagnée d'un poème.",
+        "Le vernissage a réuni les amis de l'artiste et les visiteurs du musée.",
+    ]
+    return [Document(page_content=f"{sentences[i % len(sentences)]} Paragraphe {i} : " + "texte " * 60,
+                     metadata={"source": f"{artwork.title}.pdf", "chunk_number": str(i), "page_number": i // 4 + 1})
+            for i in range(count)]
+
+
+def seed(args: dict, qdrant_service, db: FakeFirestore) -> dict:
+    """
+    Register one artwork per directory of PDFs in the fake Firestore and ingest its PDFs into Qdrant,
+    or index synthetic chunks for three artworks with --synthetic-documents.
+    """
+    from gemini.gemini_service import Artwork, Artist, Museum
+
+    start = time.perf_counter()
+    museum = Museum(name="Musée du benchmark", museum_context="Musée fictif utilisé pour les mesures de charge.")
+    if args["synthetic_documents"]:
+        artworks = [(Artwork(title=f"Oeuvre {i}", artist=Artist(name="Artiste du benchmark"), museum=museum,
+                             description="Oeuvre fictive."), None) for i in range(3)]
+    else:
+        directories = find_artwork_directories(args["data_path"])
+        if not directories:
+            raise FileNotFoundError(f"No PDF found under {args['data_path']}, use --synthetic-documents")
+        artworks = [(Artwork(title=os.path.basename(directory),
+                             artist=Artist(name=os.path.basename(os.path.dirname(directory)) or "Artiste"),
+                             museum=museum, ressources_path=directory), directory)
+                    for directory in directories]
+
+    ingestion_service = None
+    collections = {}
+    for artwork, directory in artworks:
+        db.collection("artworks").document(artwork.id).set(artwork.to_dict())
+        tenant = {"artwork_id": artwork.id, "museum_id": artwork.museum.id}
+        if directory is None:
+            report = qdrant_service.upsert_collection(synthetic_documents(artwork, args["synthetic_documents"]),
+                                                      collection_name=artwork.collection_name, tenant=tenant)
+        else:
+            if ingestion_service is None:
+                from chunking.chunking_service import ChunkingService
+                from ingestion.ingestion_service import IngestionService
+                ingestion_service = IngestionService(chunking_service=ChunkingService(), qdrant_service=qdrant_service)
+            report = ingestion_service.ingest(path=directory, collection_name=artwork.collection_name, tenant=tenant)
+        collections[artwork.collection_name] = report["added"] + report["changed"] + report["unchanged"]
+    return {"collections": collections, "seconds": round(time.perf_counter() - start, 2)}
+
+
+async def mirror_to_async_client(qdrant_service) -> None:
+    # En mémoire, les clients synchrone et asynchrone ne partagent pas leur stockage : on recopie les points
+    from qdrant_client.http import models
+    source, target = qdrant_service.qdrant_client, qdrant_service.async_qdrant_client
+    for collection in source.get_collections().collections:
+        params = source.get_collection(collection.name).config.params
+        await target.create_collection(collection_name=collection.name, vectors_config=params.vectors)
+        next_offset = None
+        while True:
+            points, next_offset = source.scroll(collection_name=collection.name, offset=next_offset, limit=256,
+                                                with_payload=True, with_vectors=True)
+            if points:
+                await target.upsert(collection_name=collection.name,
+                                    points=[models.PointStruct(id=point.id, vector=point.vector, payload=point.payload)
+                                            for point in points])
+            if next_offset is None:
+                break
+        await qdrant_service.aensure_payload_indexes(collection.name)
+
+
+def build_app(args: dict):
+    from gemini.gemini_service import GeminiService
+    from vectorstore.qdrant_service import QdrantService
+    from main import GlobalInjector, create_app
+
+    class BenchmarkGeminiService(GeminiService):
+        def __init__(self, db: FakeFirestore, model: FakeGenerativeModel, **kwargs) -> None:
+            self.benchmark_db = db
+            super().__init__(**kwargs)
+            self.model = model
+
+        def initialize_firestore(self):
+            return self.benchmark_db
+
+    if args["embeddings"] == "fake":
+        embedding_service = FakeEmbeddingService()
+    else:
+        from embedding.embedding_service import EmbeddingService
+        embedding_service = EmbeddingService()
+    qdrant_service = QdrantService(embedding_service=embedding_service, location=":memory:",
+                                   collection_layout=args["collection_layout"])
+    db = FakeFirestore(latency_ms=args["firestore_latency_ms"])
+    seed_report = seed(args, qdrant_service, db)
+    asyncio.run(mirror_to_async_client(qdrant_service))
+
+    model = FakeGenerativeModel(tokens=args["tokens"], tokens_per_chunk=args["tokens_per_chunk"],
+                                first_token_latency_ms=args["first_token_latency_ms"],
+                                token_latency_ms=args["token_latency_ms"])
+    gemini_service = BenchmarkGeminiService(
+        db=db, model=model, qdrant_service=qdrant_service, watch_artworks=False,
+        max_concurrent_streams=args["max_concurrent_streams"],
+        # Sans --answer-cache, un seuil > 1 garantit qu'aucune réponse n'est rejouée depuis le cache
+        answer_cache_threshold=0.95 if args["answer_cache"] else 1.01,
+    )
+
+    global_injector = GlobalInjector()
+    global_injector.services.update(embedding_service=embedding_service, qdrant_service=qdrant_service,
+                                    gemini_service=gemini_service)
+    global_injector.ready.set()
+    return create_app(global_injector, warm_up=False), seed_report
+
+
+def serve(args: dict, port: int, messages) -> None:
+    """
+    Child process: build the app with its stand-ins, serve it with uvicorn and report the seeding on `messages`.
+    """
+    import threading
+    import traceback
+    import warnings
+    import uvicorn
+
+    if not args["verbose"]:
+        sys.stdout = open(os.devnull, "w")
+        logging.disable(logging.WARNING)
+        warnings.simplefilter("ignore")
+    try:
+        app, seed_report = build_app(args)
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                               access_log=False, lifespan="on"))
+    except Exception:
+        messages.put({"error": traceback.format_exc()})
+        return
+
+    def notify_started():
+        while not server.started and not server.should_exit:
+            time.sleep(0.05)
+        messages.put({"seed": seed_report})
+
+    threading.Thread(target=notify_started, daemon=True).start()
+    server.run()
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_payload(index: int, collections: List[str], unique_queries: bool) -> dict:
+    query = QUERIES[index % len(QUERIES)]
+    if unique_queries:
+        query = f"{query} (visiteur {index})"
+    return {"query": query, "collection_name": collections[index % len(collections)], "stream": True}
+
+
+async def timed_request(client: httpx.AsyncClient, payload: dict) -> dict:
+    start = time.perf_counter()
+    first_byte_at = None
+    size = 0
+    try:
+        async with client.stream("POST", "/gemini/generate_rag", json=payload) as response:
+            async for chunk in response.aiter_raw():
+                if first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+                size += len(chunk)
+            status = response.status_code
+    except httpx.HTTPError as e:
+        return {"status": None, "error": type(e).__name__, "latency": time.perf_counter() - start}
+    end = time.perf_counter()
+    return {"status": status, "ttfb": (first_byte_at or end) - start, "latency": end - start, "bytes": size}
+
+
+async def run_load(base_url: str, collections: List[str], total: int, concurrency: int, timeout: float,
+                   unique_queries: bool, first_index: int = 0) -> tuple:
+    results = []
+    indexes = itertools.count(first_index)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                index = next(indexes)
+                if index >= first_index + total:
+                    return
+                results.append(await timed_request(client, build_payload(index, collections, unique_queries)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+
+def percentiles_ms(values: List[float]) -> dict:
+    if not values:
+        return {}
+    values_ms = np.array(values) * 1000
+    return {
+        "p50": round(float(np.percentile(values_ms, 50)), 2),
+        "p95": round(float(np.percentile(values_ms, 95)), 2),
+        "p99": round(float(np.percentile(values_ms, 99)), 2),
+        "mean": round(float(values_ms.mean()), 2),
+        "max": round(float(values_ms.max()), 2),
+    }
+
+
+def summarize(results: List[dict], elapsed: float) -> dict:
+    succeeded = [result for result in results if result["status"] == 200]
+    status_codes = defaultdict(int)
+    for result in results:
+        status_codes[str(result["status"] or result.get("error"))] += 1
+    return {
+        "requests": len(results),
+        "errors": len(results) - len(succeeded),
+        "status_codes": dict(status_codes),
+        "duration_s": round(elapsed, 2),
+        "throughput_rps": round(len(succeeded) / elapsed, 2) if elapsed else None,
+        "bytes_per_second": round(sum(result["bytes"] for result in succeeded) / elapsed, 1) if elapsed else None,
+        "ttfb_ms": percentiles_ms([result["ttfb"] for result in succeeded]),
+        "latency_ms": percentiles_ms([result["latency"] for result in succeeded]),
+    }
+
+
+def scrape_histogram_totals(base_url: str) -> Dict[str, List[float]]:
+    # {"<métrique>{<labels>}": [somme, nombre]} pour les histogrammes exposés par /metrics
+    totals = defaultdict(lambda: [0.0, 0.0])
+    text = httpx.get(f"{base_url}/metrics", timeout=10).text
+    for match in re.finditer(r"^(\w+)_(sum|count)(\{[^}]*\})? (\S+)$", text, re.MULTILINE):
+        name, kind, labels, value = match.groups()
+        totals[f"{name}{labels or ''}"][0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+def server_breakdown(before: Dict[str, List[float]], after: Dict[str, List[float]]) -> dict:
+    # Durée moyenne par étape pendant la mesure seule (différence des compteurs avant / après)
+    breakdown = {}
+    for key, (total, count) in after.items():
+        previous_total, previous_count = before.get(key, (0.0, 0.0))
+        if count - previous_count <= 0:
+            continue
+        mean = (total - previous_total) / (count - previous_count)
+        stage = re.fullmatch(r'artalk_rag_stage_seconds\{stage="([^"]+)"\}', key)
+        if stage:
+            breakdown[f"stage_{stage.group(1)}_ms"] = round(mean * 1000, 2)
+        elif key == "artalk_gemini_time_to_first_token_seconds":
+            breakdown["gemini_ttft_ms"] = round(mean * 1000, 2)
+        elif key == "artalk_gemini_generated_tokens":
+            breakdown["gemini_tokens"] = round(mean, 1)
+    return breakdown
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_with_baseline(results: dict, baseline: dict, max_regression: Optional[float]) -> bool:
+    print(f"Comparaison avec {baseline.get('commit')} ({baseline.get('timestamp')}) :")
+    regressed = False
+    for path, higher_is_better in COMPARED_METRICS:
+        current, previous = results, baseline
+        for key in path:
+            current, previous = (current or {}).get(key), (previous or {}).get(key)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        flag = ""
+        if max_regression is not None and worse > max_regression:
+            regressed, flag = True, "  <-- régression"
+        print(f"  {'.'.join(path):>16} : {previous:>10} -> {current:>10} ({change:+.1%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark of /gemini/generate_rag with local stand-ins.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup-requests", type=int, default=16, help="Requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per request timeout in seconds")
+    parser.add_argument("--data-path", default="./data", help="One artwork per directory containing PDFs")
+    parser.add_argument("--synthetic-documents", type=int, default=0,
+                        help="Index this many synthetic chunks for 3 artworks instead of ingesting the PDFs")
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model",
+                        help="model: EmbeddingService (EMBEDDING_BACKEND applies); fake: hash-based embeddings")
+    parser.add_argument("--collection-layout", choices=["per_artwork", "shared"], default=None)
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens generated by the fake Gemini model")
+    parser.add_argument("--tokens-per-chunk", type=int, default=5)
+    parser.add_argument("--first-token-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    parser.add_argument("--firestore-latency-ms", type=float, default=30.0)
+    parser.add_argument("--max-concurrent-streams", type=int, default=32)
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache enabled")
+    parser.add_argument("--repeat-queries", action="store_true",
+                        help="Reuse the same few questions instead of making every query unique")
+    parser.add_argument("--startup-timeout", type=float, default=900.0, help="Seconds allowed for seeding")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit with status 1 when a compared metric is worse than the baseline by this ratio")
+    parser.add_argument("--verbose", action="store_true", help="Keep the server output")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    context = multiprocessing.get_context("spawn")
+    messages = context.Queue()
+    server = context.Process(target=serve, args=(vars(args), port, messages), daemon=True)
+    server.start()
+    try:
+        message = messages.get(timeout=args.startup_timeout)
+        if "error" in message:
+            print(f"Échec du démarrage du serveur :\n{message['error']}")
+            sys.exit(1)
+        seed_report = message["seed"]
+        collections = list(seed_report["collections"])
+        print(f"Serveur prêt sur {base_url}, {sum(seed_report['collections'].values())} chunks "
+              f"dans {len(collections)} collection(s) indexés en {seed_report['seconds']}s")
+
+        unique_queries = not args.repeat_queries
+        if args.warmup_requests:
+            asyncio.run(run_load(base_url, collections, args.warmup_requests, args.concurrency, args.timeout,
+                                 unique_queries))
+        before = scrape_histogram_totals(base_url)
+        results, elapsed = asyncio.run(run_load(base_url, collections, args.requests, args.concurrency, args.timeout,
+                                                unique_queries, first_index=args.warmup_requests))
+        after = scrape_histogram_totals(base_url)
+    finally:
+        server.terminate()
+        server.join(timeout=10)
+
+    report = {
+        "benchmark": "serving",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "baseline", "max_regression", "verbose")},
+        "seed": seed_report,
+        **summarize(results, elapsed),
+        "server": server_breakdown(before, after),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare_with_baseline(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
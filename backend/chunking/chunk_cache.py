@@ -0,0 +1,151 @@
+from typing import Iterable, Iterator, List, Optional, Tuple
+import tempfile
+import hashlib
+import gzip
+import json
+import os
+
+from unstructured.__version__ import __version__ as unstructured_version
+from unstructured.documents.elements import Element
+from unstructured.staging.base import elements_from_dicts
+
+
+class ChunkCache:
+    """
+    On-disk chunk cache keyed on the PDF content hash, the partition/chunking parameters and the
+    unstructured version. Each entry is a gzip'd JSON lines file (a header line, then one chunk per line)
+    so chunks can be streamed back one by one. Least recently used entries are evicted past max_size_bytes.
+    """
+    def __init__(self, cache_dir: str = "./data/chunk_cache", max_size_bytes: int = 512 * 1024 * 1024) -> None:
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def key(self, file_path: str, params: dict) -> str:
+        key_data = {"file": self.file_hash(file_path), "params": params, "unstructured": unstructured_version}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jsonl.gz")
+
+    def open(self, key: str) -> Optional[Tuple[dict, Iterator[Element]]]:
+        """
+        Header and chunk iterator of an entry, or None on a cache miss. The file is opened right away, so an
+        entry evicted by another process afterwards is still read to the end, and one evicted before is a miss.
+        """
+        path = self.path(key)
+        try:
+            file = gzip.open(path, 'rt', encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        try:
+            header = json.loads(file.readline())
+            # Mise à jour de la date d'accès pour l'éviction LRU
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            file.close()
+            raise
+        return header, self.iter_file_chunks(file)
+
+    @staticmethod
+    def iter_file_chunks(file) -> Iterator[Element]:
+        with file:
+            for line in file:
+                yield elements_from_dicts([json.loads(line)])[0]
+
+    def load(self, key: str) -> Optional[Tuple[dict, List[Element]]]:
+        entry = self.open(key)
+        if entry is None:
+            return None
+        header, chunks = entry
+        return header, list(chunks)
+
+    def writer(self, key: str, header: Optional[dict] = None) -> "ChunkCacheWriter":
+        return ChunkCacheWriter(self, key, header=header)
+
+    def save(self, key: str, chunks: Iterable[Element], header: Optional[dict] = None) -> None:
+        with self.writer(key, header=header) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    def evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".jsonl.gz"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    # Déjà évincée par un autre process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                # Déjà supprimée, ou encore ouverte par un lecteur sous Windows : elle sera évincée plus tard
+                continue
+            total_size -= size
+
+
+class ChunkCacheWriter:
+    """
+    Cache entry written chunk by chunk, so a PDF never has to be held in memory to be cached. Chunks go to a
+    temporary file of the writer's own; as a context manager the entry is published atomically on a normal
+    exit and discarded if an exception, or the close of the generator writing it, gets out.
+    """
+    def __init__(self, cache: ChunkCache, key: str, header: Optional[dict] = None) -> None:
+        self.cache = cache
+        self.key = key
+        # Fichier temporaire propre à chaque écrivain : deux jobs qui écrivent la même clé ne se mélangent pas
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.cache_dir, prefix=f"{key}.", suffix=".tmp")
+        self.raw_file = os.fdopen(fd, 'wb')
+        self.file = gzip.open(self.raw_file, 'wt', encoding="utf-8")
+        try:
+            self.file.write(json.dumps(header or {}) + "\n")
+        except BaseException:
+            self.discard()
+            raise
+
+    def write(self, chunk: Element) -> None:
+        self.file.write(json.dumps(chunk.to_dict()) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+        self.raw_file.close()
+
+    def commit(self) -> None:
+        try:
+            self.close()
+            # Écriture atomique : une entrée partielle n'est jamais visible
+            os.replace(self.tmp_path, self.cache.path(self.key))
+        except BaseException:
+            self.discard()
+            raise
+        self.cache.evict()
+
+    def discard(self) -> None:
+        self.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self) -> "ChunkCacheWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
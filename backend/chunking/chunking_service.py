@@ -1,17 +1,62 @@
 from injector import singleton
-from typing import List
-import pickle
+from typing import Iterable, Iterator, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import datetime
+import multiprocessing
+import itertools
+import tempfile
 import os
 
 from langchain.schema.document import Document
+from pypdf import PdfReader, PdfWriter
 from unstructured.partition.pdf import partition_pdf
 from unstructured.chunking.title import chunk_by_title
-from unstructured.documents.elements import Element
+from unstructured.documents.elements import Element, Title
+from chunking.chunk_cache import ChunkCache
+
+
+def partition_pdf_pages(file_path: str, first_page: int, last_page: int, strategy: str, languages: List[str]) -> list[Element]:
+    """
+    Partition pages first_page..last_page (1-based, inclusive) of a PDF.
+    Module-level so it can be sent to a ProcessPoolExecutor.
+    """
+    reader = PdfReader(file_path)
+    if first_page == 1 and last_page == len(reader.pages):
+        return partition_pdf(file_path, strategy=strategy, languages=languages)
+
+    writer = PdfWriter()
+    for page_index in range(first_page - 1, last_page):
+        writer.add_page(reader.pages[page_index])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pages_path = os.path.join(tmp_dir, os.path.basename(file_path))
+        with open(pages_path, 'wb') as file:
+            writer.write(file)
+        elements = partition_pdf(pages_path, strategy=strategy, languages=languages)
+
+    # Remettre les métadonnées dans le référentiel du fichier d'origine (même format de date qu'unstructured)
+    last_modified = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime("%Y-%m-%dT%H:%M:%S")
+    for element in elements:
+        if element.metadata.page_number is not None:
+            element.metadata.page_number += first_page - 1
+        element.metadata.filename = os.path.basename(file_path)
+        element.metadata.file_directory = os.path.dirname(file_path)
+        element.metadata.last_modified = last_modified
+    return elements
+
 
 @singleton
 class ChunkingService:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, max_workers: Optional[int] = None, pages_per_task: int = 8,
+                 chunk_cache_dir: str = "./data/chunk_cache", chunk_cache_max_bytes: int = 512 * 1024 * 1024,
+                 text_layer_min_chars: int = 50) -> None:
+        # Chaque process charge le modèle de layout hi_res : pool borné par défaut (CHUNKING_MAX_WORKERS).
+        # max_workers=1 : partitionnement en série dans le process courant
+        self.max_workers = max_workers or int(os.getenv("CHUNKING_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+        self.pages_per_task = pages_per_task
+        self.chunk_cache = ChunkCache(cache_dir=chunk_cache_dir, max_size_bytes=chunk_cache_max_bytes)
+        # En mode "adaptive", une page avec au moins ce nombre de caractères extractibles passe en "fast"
+        self.text_layer_min_chars = text_layer_min_chars
 
     def clean_metadata(self, metadata: dict) -> dict:
         """
@@ -33,42 +78,239 @@ class ChunkingService:
                 clean_meta[key] = str(value)  # Convert unsupported types to string
         return clean_meta
 
+    def probe_page_strategies(self, file_path: str, strategy: str) -> dict[str, str]:
+        """
+        Strategy to use for each page (keyed by page number as str). In "adaptive" mode, pages with an
+        extractable text layer use the fast text path and scanned/image-only pages fall back to hi_res.
+        """
+        pages = PdfReader(file_path).pages
+        if strategy != "adaptive":
+            return {str(page_number): strategy for page_number in range(1, len(pages) + 1)}
+
+        page_strategies = {}
+        for page_number, page in enumerate(pages, start=1):
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                print(f"Impossible d'extraire le texte de la page {page_number} de {file_path} : {e}")
+                text = ""
+            page_strategies[str(page_number)] = "fast" if len(text.strip()) >= self.text_layer_min_chars else "hi_res"
+        return page_strategies
+
+    def get_page_ranges(self, page_strategies: dict[str, str]) -> list[tuple[int, int, str]]:
+        # Regroupe les pages consécutives de même stratégie, par paquets d'au plus pages_per_task pages
+        page_ranges = []
+        for page_number in range(1, len(page_strategies) + 1):
+            page_strategy = page_strategies[str(page_number)]
+            if page_ranges:
+                first_page, last_page, range_strategy = page_ranges[-1]
+                if range_strategy == page_strategy and last_page - first_page + 1 < self.pages_per_task:
+                    page_ranges[-1] = (first_page, page_number, range_strategy)
+                    continue
+            page_ranges.append((page_number, page_number, page_strategy))
+        return page_ranges
+
     def get_chunks_from_pdf(self, 
                             file_path: str, 
-                            strategy: str = "hi_res", 
+                            strategy: str = "adaptive", 
                             languages: List[str] = ["fra"],
                             new_after_n_chars: float = 2500,
                             multipage_sections: bool = True,
                             combine_text_under_n_chars: float = 500,
                             max_characters: float = 4000) -> list[Element]:
 
-        # Générer le nom du fichier pickle
-        pickle_file_path = f"./data/{os.path.splitext(os.path.basename(file_path))[0][:20]}.pickle"
+        return self.get_chunks_from_pdfs(file_paths=[file_path],
+                                         strategy=strategy,
+                                         languages=languages,
+                                         new_after_n_chars=new_after_n_chars,
+                                         multipage_sections=multipage_sections,
+                                         combine_text_under_n_chars=combine_text_under_n_chars,
+                                         max_characters=max_characters)[0]
 
-        # Vérifier si le fichier pickle existe déjà
-        if os.path.exists(pickle_file_path):
-            print(f"Le fichier pickle {pickle_file_path} existe déjà, chargement des chunks...")
-            with open(pickle_file_path, 'rb') as file:
-                chunks = pickle.load(file)
-            return chunks
+    def get_chunks_from_pdfs(self, 
+                             file_paths: List[str], 
+                             strategy: str = "adaptive", 
+                             languages: List[str] = ["fra"],
+                             new_after_n_chars: float = 2500,
+                             multipage_sections: bool = True,
+                             combine_text_under_n_chars: float = 500,
+                             max_characters: float = 4000) -> list[list[Element]]:
+        results = self.partition_and_chunk_pdfs(file_paths=file_paths,
+                                                strategy=strategy,
+                                                languages=languages,
+                                                new_after_n_chars=new_after_n_chars,
+                                                multipage_sections=multipage_sections,
+                                                combine_text_under_n_chars=combine_text_under_n_chars,
+                                                max_characters=max_characters)
+        return [chunks for chunks, _ in results]
 
-        # Si le fichier pickle n'existe pas, générer les chunks
-        print(f"On partitionne le pdf")
-        elements = partition_pdf(file_path, strategy=strategy, languages=languages)
-        print(f"On chunk le pdf")
-        chunks = chunk_by_title(elements, new_after_n_chars=new_after_n_chars, 
-                                multipage_sections=multipage_sections, combine_text_under_n_chars=combine_text_under_n_chars, 
-                                max_characters=max_characters)
+    def get_chunk_params(self, strategy: str, languages: List[str], new_after_n_chars: float, multipage_sections: bool,
+                         combine_text_under_n_chars: float, max_characters: float) -> dict:
+        # Clé de cache : contenu du fichier + paramètres + version d'unstructured
+        params = {"strategy": strategy, "languages": list(languages), "new_after_n_chars": new_after_n_chars,
+                  "multipage_sections": multipage_sections, "combine_text_under_n_chars": combine_text_under_n_chars,
+                  "max_characters": max_characters}
+        if strategy == "adaptive":
+            params["text_layer_min_chars"] = self.text_layer_min_chars
+        return params
 
-        # Sauvegarder les chunks dans un fichier pickle
-        with open(pickle_file_path, 'wb') as file:
-            pickle.dump(chunks, file)
+    def partition_and_chunk_pdfs(self, 
+                                 file_paths: List[str], 
+                                 strategy: str = "adaptive", 
+                                 languages: List[str] = ["fra"],
+                                 new_after_n_chars: float = 2500,
+                                 multipage_sections: bool = True,
+                                 combine_text_under_n_chars: float = 500,
+                                 max_characters: float = 4000) -> list[tuple[list[Element], dict[str, str]]]:
+        """
+        Partition and chunk several PDFs, returning the chunks and the strategy used for each page, per file.
+        See iter_pdf_chunks.
+        """
+        chunks_per_file = {file_path: [] for file_path in file_paths}
+        page_strategies_per_file = {file_path: {} for file_path in file_paths}
+        for file_path, chunk, page_strategies in self.iter_pdf_chunks(file_paths=file_paths,
+                                                                      strategy=strategy,
+                                                                      languages=languages,
+                                                                      new_after_n_chars=new_after_n_chars,
+                                                                      multipage_sections=multipage_sections,
+                                                                      combine_text_under_n_chars=combine_text_under_n_chars,
+                                                                      max_characters=max_characters):
+            chunks_per_file[file_path].append(chunk)
+            page_strategies_per_file[file_path] = page_strategies
+        return [(chunks_per_file[file_path], page_strategies_per_file[file_path]) for file_path in file_paths]
 
-        return chunks
+    def iter_partitioned_page_ranges(self, tasks: List[tuple], languages: List[str]) -> Iterator[list[Element]]:
+        """
+        Elements of each (file_path, first_page, last_page, strategy) task, in task order. Tasks of all files
+        share the process pool and run at most 2 * max_workers ahead of the consumer.
+        """
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            for file_path, first_page, last_page, page_strategy in tasks:
+                yield partition_pdf_pages(file_path, first_page, last_page, page_strategy, languages)
+            return
+
+        # spawn plutôt que fork : le process serveur a des canaux gRPC et des threads actifs, un fork pourrait
+        # hériter d'un verrou tenu par l'un d'eux et bloquer le worker
+        executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks)),
+                                       mp_context=multiprocessing.get_context("spawn"))
+        try:
+            pending_tasks = iter(tasks)
+            futures = deque(executor.submit(partition_pdf_pages, *task, languages)
+                            for task in itertools.islice(pending_tasks, 2 * self.max_workers))
+            while futures:
+                elements = futures.popleft().result()
+                for task in itertools.islice(pending_tasks, 1):
+                    futures.append(executor.submit(partition_pdf_pages, *task, languages))
+                yield elements
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def chunk_page_ranges(elements_per_range: Iterable[list[Element]], **chunk_kwargs) -> Iterator[Element]:
+        """
+        Chunk a file page range by page range, as soon as each range is partitioned. The elements of the last,
+        possibly unfinished, section (from its Title on) are carried over to the next range, so a section is
+        never cut at a range boundary; only small sections on either side of a boundary are not combined.
+        """
+        carried_over = []
+        for elements in elements_per_range:
+            carried_over.extend(elements)
+            last_title = max((i for i, element in enumerate(carried_over) if isinstance(element, Title)), default=0)
+            if last_title > 0:
+                yield from chunk_by_title(carried_over[:last_title], **chunk_kwargs)
+                carried_over = carried_over[last_title:]
+        if carried_over:
+            yield from chunk_by_title(carried_over, **chunk_kwargs)
+
+    def iter_pdf_chunks(self,
+                        file_paths: List[str],
+                        strategy: str = "adaptive",
+                        languages: List[str] = ["fra"],
+                        new_after_n_chars: float = 2500,
+                        multipage_sections: bool = True,
+                        combine_text_under_n_chars: float = 500,
+                        max_characters: float = 4000) -> Iterator[tuple[str, Element, dict[str, str]]]:
+        """
+        Chunks of several PDFs as (file_path, chunk, page_strategies), in file then page order. Cached files are
+        read back from the chunk cache; the page ranges of the others are fanned out across the process pool,
+        and each range is chunked and yielded as soon as it and the ranges before it are partitioned, so
+        embedding overlaps with the partitioning of later pages and files.
+        """
+        params = self.get_chunk_params(strategy=strategy,
+                                       languages=languages,
+                                       new_after_n_chars=new_after_n_chars,
+                                       multipage_sections=multipage_sections,
+                                       combine_text_under_n_chars=combine_text_under_n_chars,
+                                       max_characters=max_characters)
+        chunk_kwargs = {"new_after_n_chars": new_after_n_chars, "multipage_sections": multipage_sections,
+                        "combine_text_under_n_chars": combine_text_under_n_chars, "max_characters": max_characters}
+        cache_keys = {file_path: self.chunk_cache.key(file_path, params) for file_path in file_paths}
+        # Entrées ouvertes dès maintenant : une éviction concurrente ne peut plus les faire disparaître
+        cached_entries = {}
+        for file_path in file_paths:
+            entry = self.chunk_cache.open(cache_keys[file_path])
+            if entry is not None:
+                cached_entries[file_path] = entry
+        pending_files = [file_path for file_path in file_paths if file_path not in cached_entries]
+
+        page_strategies_per_file = {file_path: self.probe_page_strategies(file_path, strategy)
+                                    for file_path in pending_files}
+        page_ranges_per_file = {file_path: self.get_page_ranges(page_strategies_per_file[file_path])
+                                for file_path in pending_files}
+        tasks = [(file_path, first_page, last_page, page_strategy)
+                 for file_path in pending_files
+                 for first_page, last_page, page_strategy in page_ranges_per_file[file_path]]
+        if pending_files:
+            print(f"On partitionne {len(pending_files)} pdf(s) ({len(tasks)} paquets de pages) sur {self.max_workers} process")
+        partitioned_page_ranges = self.iter_partitioned_page_ranges(tasks, languages)
+
+        try:
+            for file_path in file_paths:
+                if file_path in cached_entries:
+                    print(f"Chunks de {file_path} trouvés dans le cache, chargement...")
+                    header, chunks = cached_entries[file_path]
+                    page_strategies = header.get("page_strategies", {})
+                    for chunk in chunks:
+                        yield file_path, chunk, page_strategies
+                    continue
+
+                page_strategies = page_strategies_per_file[file_path]
+                print(f"On chunk le pdf {file_path} (pages hi_res : "
+                      f"{sum(1 for page_strategy in page_strategies.values() if page_strategy == 'hi_res')}/{len(page_strategies)})")
+                file_page_ranges = itertools.islice(partitioned_page_ranges, len(page_ranges_per_file[file_path]))
+                # Chaque chunk part dans l'entrée de cache au fil de l'eau, publiée une fois le pdf terminé :
+                # la mémoire ne dépend pas de la taille du pdf
+                header = {"source": os.path.basename(file_path), "params": params, "page_strategies": page_strategies}
+                with self.chunk_cache.writer(cache_keys[file_path], header=header) as cache_writer:
+                    for chunk in self.chunk_page_ranges(file_page_ranges, **chunk_kwargs):
+                        cache_writer.write(chunk)
+                        yield file_path, chunk, page_strategies
+        finally:
+            partitioned_page_ranges.close()
+            for _, chunks in cached_entries.values():
+                chunks.close()
+
+    @staticmethod
+    def list_pdf_files(path: str) -> List[str]:
+        if os.path.isfile(path):
+            return [path]
+        if os.path.isdir(path):
+            # Ordre trié pour que la numérotation des chunks soit stable d'une ingestion à l'autre
+            return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.pdf'))
+        return []
+
+    def chunk_to_document(self, chunk: Element, chunk_number: int, page_strategies: dict[str, str], strategy: str) -> Document:
+        metadata = chunk.metadata.to_dict()
+        metadata["source"] = metadata["filename"]
+        metadata["chunk_number"] = str(chunk_number)
+        # Stratégie de partitionnement de la page où commence le chunk
+        metadata["partition_strategy"] = page_strategies.get(str(metadata.get("page_number")), strategy)
+        clean_meta = self.clean_metadata(metadata)
+        return Document(page_content=chunk.text, metadata=clean_meta)
 
     def get_chunked_documents_from_pdf(self, 
                                         path: str, 
-                                        strategy: str = "hi_res", 
+                                        strategy: str = "adaptive", 
                                         languages: List[str] = ["fra"],
                                         new_after_n_chars: float = 2500,
                                         multipage_sections: bool = True,
@@ -76,53 +318,52 @@ class ChunkingService:
                                         max_characters: float = 4000) -> List[Document]:
         
         chunks_list = []
-        if os.path.isfile(path):
-            chunks = self.get_chunks_from_pdf(file_path=path,
-                                            strategy=strategy,
-                                            languages=languages,
-                                            new_after_n_chars=new_after_n_chars,
-                                            multipage_sections=multipage_sections,
-                                            combine_text_under_n_chars=combine_text_under_n_chars,
-                                            max_characters=max_characters)
-            chunks_list.append(chunks)
-            
-        elif os.path.isdir(path):
-            pdf_files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith('.pdf')]
-            for pdf_path in pdf_files:
-                chunks = self.get_chunks_from_pdf(file_path=pdf_path,
-                                            strategy=strategy,
-                                            languages=languages,
-                                            new_after_n_chars=new_after_n_chars,
-                                            multipage_sections=multipage_sections,
-                                            combine_text_under_n_chars=combine_text_under_n_chars,
-                                            max_characters=max_characters)
-                for chunk in chunks:
-                    chunks_list.append(chunk)
+        pdf_files = self.list_pdf_files(path)
+
+        for chunks, page_strategies in self.partition_and_chunk_pdfs(file_paths=pdf_files,
+                                                                     strategy=strategy,
+                                                                     languages=languages,
+                                                                     new_after_n_chars=new_after_n_chars,
+                                                                     multipage_sections=multipage_sections,
+                                                                     combine_text_under_n_chars=combine_text_under_n_chars,
+                                                                     max_characters=max_characters):
+            chunks_list.extend((chunk, page_strategies) for chunk in chunks)
                 
         n = 0
         documents = []
-        print(f"Chunk List  === {chunks_list}")
-        for chunk in chunks_list:
+        print(f"Chunk List  === {[chunk for chunk, _ in chunks_list]}")
+        for chunk, page_strategies in chunks_list:
             try:
-                metadata = chunk.metadata.to_dict()
-                metadata["source"] = metadata["filename"]
-                metadata["chunk_number"] = str(n)
-                clean_meta = self.clean_metadata(metadata)
-                documents.append(Document(page_content=chunk.text, metadata=clean_meta))
+                documents.append(self.chunk_to_document(chunk, n, page_strategies, strategy))
                 n += 1
             except Exception as e:
                 print(f"Erreur lors du passage des chunks aux documents : {e}")
         return documents
 
-    def save_chunked_documents_to_pickle(self, file_path, documents, file_name = ""):
-        if file_name:
-            pickle_file_path = f"./data/{os.path.splitext(file_name)}.pickle"
-        else:
-            pickle_file_path = f"./data/{os.path.splitext(os.path.basename(file_path))[0][:20]}.pickle"
-
-        if os.path.exists(pickle_file_path):
-            print(f"Le fichier pickle {pickle_file_path} existe déjà")
-        else:
-            with open(pickle_file_path, 'wb') as file:
-                pickle.dump(documents, file)
-        return pickle_file_path
+    def iter_chunked_documents(self, 
+                               path: str, 
+                               strategy: str = "adaptive", 
+                               languages: List[str] = ["fra"],
+                               new_after_n_chars: float = 2500,
+                               multipage_sections: bool = True,
+                               combine_text_under_n_chars: float = 500,
+                               max_characters: float = 4000) -> Iterator[Document]:
+        """
+        Streaming counterpart of get_chunked_documents_from_pdf: chunks are yielded as their page range is
+        partitioned (see iter_pdf_chunks) and cached chunks are read back line by line.
+        """
+        n = 0
+        for _, chunk, page_strategies in self.iter_pdf_chunks(file_paths=self.list_pdf_files(path),
+                                                              strategy=strategy,
+                                                              languages=languages,
+                                                              new_after_n_chars=new_after_n_chars,
+                                                              multipage_sections=multipage_sections,
+                                                              combine_text_under_n_chars=combine_text_under_n_chars,
+                                                              max_characters=max_characters):
+            try:
+                document = self.chunk_to_document(chunk, n, page_strategies, strategy)
+            except Exception as e:
+                print(f"Erreur lors du passage des chunks aux documents : {e}")
+                continue
+            n += 1
+            yield document
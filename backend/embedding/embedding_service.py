@@ -1,25 +1,211 @@
 from injector import singleton, inject
 from langchain.storage import LocalFileStore
-from typing import List
+from typing import List, Optional
 from langchain.embeddings import CacheBackedEmbeddings
 from langchain.schema.document import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings.embeddings import Embeddings
+from cachetools import LRUCache
+from concurrent.futures import Future
 from pathlib import Path
+from embedding.onnx_embeddings import OnnxEmbeddings
+from metrics.metrics_service import record_cache
+import unicodedata
+import threading
+import asyncio
+import hashlib
+import queue
+import json
+import time
+import os
 
 
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, keyed on the normalized query text and the model name.
+    Optionally persisted on disk through a LocalFileStore.
+    """
+    def __init__(self, model_name: str, maxsize: int = 1024, store: Optional[LocalFileStore] = None) -> None:
+        self.model_name = model_name
+        self.entries = LRUCache(maxsize=maxsize)
+        self.store = store
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        with self.lock:
+            embedding = self.entries.get(key)
+        if embedding is None and self.store is not None:
+            stored = self.store.mget([key])[0]
+            if stored is not None:
+                embedding = json.loads(stored)
+                with self.lock:
+                    self.entries[key] = embedding
+        with self.lock:
+            if embedding is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return embedding
+
+    def set(self, text: str, embedding: List[float]) -> None:
+        key = self.key(text)
+        with self.lock:
+            self.entries[key] = embedding
+        if self.store is not None:
+            self.store.mset([(key, json.dumps(embedding).encode("utf-8"))])
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
+class BatchedQueryEmbeddings(Embeddings):
+    """
+    Micro-batching of query embeddings: requests arriving within max_wait_ms of each other
+    (or up to max_batch_size) are run as a single batched forward pass by a background worker,
+    each caller getting its own vector back through a future.
+    """
+    def __init__(self, embedder: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0) -> None:
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.worker = None
+        self.worker_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        self.ensure_worker()
+        future = Future()
+        self.requests.put((text, future))
+        return future
+
+    def ensure_worker(self) -> None:
+        with self.worker_lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run, name="query-embedding-batcher", daemon=True)
+                self.worker.start()
+
+    def next_batch(self) -> list:
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self) -> None:
+        while True:
+            batch = [(text, future) for text, future in self.next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                embeddings = self.embedder.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper serving embed_query from a QueryEmbeddingCache.
+    Document embeddings are delegated untouched to the underlying embedder,
+    cache misses on queries go to query_embedder (defaults to the same embedder).
+    """
+    def __init__(self, embedder: Embeddings, cache: QueryEmbeddingCache,
+                 query_embedder: Optional[Embeddings] = None) -> None:
+        self.embedder = embedder
+        self.cache = cache
+        self.query_embedder = query_embedder or embedder
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedder.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embedder.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        embedding = self.cache.get(text)
+        record_cache("query_embedding", hit=embedding is not None)
+        if embedding is None:
+            embedding = self.query_embedder.embed_query(text)
+            self.cache.set(text, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str) -> List[float]:
+        embedding = self.cache.get(text)
+        record_cache("query_embedding", hit=embedding is not None)
+        if embedding is None:
+            embedding = await self.query_embedder.aembed_query(text)
+            self.cache.set(text, embedding)
+        return embedding
+
 
 @singleton
 class EmbeddingService:
     def __init__(self, model_name: str = "OrdalieTech/Solon-embeddings-large-0.1",
                  root_path: str = Path("/data/vectorstore/cache"),
                  embed_model_cache_path = r"./data/embedding/cache/",
-                 
+                 query_cache_size: int = 1024,
+                 query_cache_path: Optional[str] = None,
+                 batch_queries: bool = True,
+                 max_query_batch_size: int = 32,
+                 max_query_batch_wait_ms: float = 5.0,
+                 backend: Optional[str] = None,
+                 onnx_cache_path: str = r"./data/embedding/onnx/",
+                 onnx_quantize: bool = True,
                  ) -> None:
-        self.embeddings_model = HuggingFaceEmbeddings(model_name=model_name)
+        self.model_name = model_name
+        # "torch" (HuggingFaceEmbeddings) ou "onnx" (ONNX Runtime, int8 par défaut)
+        self.backend = backend or os.getenv("EMBEDDING_BACKEND", "torch")
+        if self.backend == "onnx":
+            self.embeddings_model = OnnxEmbeddings(model_name=model_name, cache_dir=onnx_cache_path, quantize=onnx_quantize)
+            backend_id = f"onnx-{'int8' if onnx_quantize else 'fp32'}"
+        elif self.backend == "torch":
+            self.embeddings_model = HuggingFaceEmbeddings(model_name=model_name)
+            backend_id = None
+        else:
+            raise ValueError(f"Unknown embedding backend '{self.backend}'")
         self.document_store = LocalFileStore(root_path)
+        # Les vecteurs ONNX et PyTorch ne sont pas identiques : chaque backend a son propre espace de cache
         self.embedder = CacheBackedEmbeddings.from_bytes_store(
                 self.embeddings_model,
                 self.document_store,
-                namespace=embed_model_cache_path
+                namespace=f"{embed_model_cache_path}{backend_id}" if backend_id else embed_model_cache_path
             )
-    
+        # Cache des embeddings de requêtes (CacheBackedEmbeddings ne cache que les documents)
+        query_store = LocalFileStore(query_cache_path) if query_cache_path else None
+        query_cache_model = f"{model_name}+{backend_id}" if backend_id else model_name
+        self.query_cache = QueryEmbeddingCache(model_name=query_cache_model, maxsize=query_cache_size, store=query_store)
+        # Les requêtes concurrentes sont regroupées en un seul forward pass
+        self.query_batcher = BatchedQueryEmbeddings(self.embeddings_model,
+                                                    max_batch_size=max_query_batch_size,
+                                                    max_wait_ms=max_query_batch_wait_ms) if batch_queries else None
+        self.query_embedder = CachedQueryEmbeddings(self.embedder, self.query_cache, query_embedder=self.query_batcher)
+
@@ -0,0 +1,91 @@
+from langchain_core.embeddings.embeddings import Embeddings
+from typing import List, Optional
+import numpy as np
+import shutil
+import json
+import os
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings on ONNX Runtime, with int8 dynamic quantization of the weights.
+    The model is exported from the Hugging Face checkpoint once, quantized and cached on disk;
+    later starts only load the cached .onnx file. Pooling is the mean over the attention mask,
+    as in the sentence-transformers model run by HuggingFaceEmbeddings.
+    """
+    def __init__(self, model_name: str, cache_dir: str = "./data/embedding/onnx/", quantize: bool = True,
+                 max_length: int = 512, batch_size: int = 32, normalize: bool = False,
+                 intra_op_threads: Optional[int] = None) -> None:
+        # Dépendances optionnelles, importées seulement quand ce backend est choisi
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.model_dir = os.path.join(cache_dir, model_name.replace("/", "__"), "int8" if quantize else "fp32")
+        self.ensure_exported()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(os.path.join(self.model_dir, "model.onnx"), options,
+                                                    providers=["CPUExecutionProvider"])
+        self.input_names = {session_input.name for session_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+    def ensure_exported(self):
+        if os.path.exists(os.path.join(self.model_dir, "export.json")):
+            return
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        print(f"Export ONNX de {self.model_name} vers {self.model_dir}")
+        tmp_dir = f"{self.model_dir}.tmp"
+        export_dir = os.path.join(tmp_dir, "export")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        ORTModelForFeatureExtraction.from_pretrained(self.model_name, export=True).save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(self.model_name).save_pretrained(tmp_dir)
+
+        if self.quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            # Poids en int8, activations quantifiées à la volée : pas de jeu de calibration nécessaire
+            quantize_dynamic(os.path.join(export_dir, "model.onnx"), os.path.join(tmp_dir, "model.onnx"),
+                             weight_type=QuantType.QInt8, use_external_data_format=True)
+            shutil.rmtree(export_dir)
+        else:
+            for name in os.listdir(export_dir):
+                shutil.move(os.path.join(export_dir, name), tmp_dir)
+            os.rmdir(export_dir)
+
+        with open(os.path.join(tmp_dir, "export.json"), "w", encoding="utf-8") as file:
+            json.dump({"model_name": self.model_name, "quantize": self.quantize}, file)
+        # Le dossier n'apparaît qu'une fois l'export terminé
+        shutil.rmtree(self.model_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.model_dir)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+        last_hidden_state = self.session.run(None, inputs)[0]
+        mask = inputs["attention_mask"][..., None].astype(last_hidden_state.dtype)
+        embeddings = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Les textes de longueur proche sont regroupés pour limiter le padding dans chaque batch
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            for i, embedding in zip(indices, self.embed_batch([texts[i] for i in indices]).tolist()):
+                embeddings[i] = embedding
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
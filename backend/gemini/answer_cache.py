@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+import numpy as np
+
+
+class AnswerCacheEntry:
+    def __init__(self, embedding: np.ndarray, chunks: List[str], expires_at: float) -> None:
+        self.embedding = embedding
+        self.chunks = chunks
+        self.expires_at = expires_at
+
+
+class SemanticAnswerCache:
+    """
+    Per-collection cache of generated answers, keyed by query embedding.
+    A lookup hits when a stored query is at least `similarity_threshold` (cosine) close to the new one.
+    """
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 3600,
+                 max_entries_per_collection: int = 256) -> None:
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_collection = max_entries_per_collection
+        self.entries: Dict[Tuple[str, Optional[str]], List[AnswerCacheEntry]] = {}
+        self.generations: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def generation(self, collection_name: str) -> int:
+        with self.lock:
+            return self.generations.get(collection_name, 0)
+
+    def lookup(self, collection_name: str, prompt_template: Optional[str], embedding: List[float]) -> Optional[List[str]]:
+        vector = self.normalize(embedding)
+        now = time.monotonic()
+        with self.lock:
+            key = (collection_name, prompt_template)
+            entries = [entry for entry in self.entries.get(key, []) if entry.expires_at > now]
+            self.entries[key] = entries
+            best_entry, best_score = None, self.similarity_threshold
+            for entry in entries:
+                score = float(np.dot(entry.embedding, vector))
+                if score >= best_score:
+                    best_entry, best_score = entry, score
+            if best_entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(best_entry.chunks)
+
+    def store(self, collection_name: str, prompt_template: Optional[str], embedding: List[float],
+              chunks: List[str], generation: int) -> None:
+        entry = AnswerCacheEntry(self.normalize(embedding), list(chunks), time.monotonic() + self.ttl_seconds)
+        with self.lock:
+            # La collection a été invalidée pendant la génération : la réponse est peut-être périmée
+            if self.generations.get(collection_name, 0) != generation:
+                return
+            entries = self.entries.setdefault((collection_name, prompt_template), [])
+            entries.append(entry)
+            del entries[:-self.max_entries_per_collection]
+
+    def invalidate(self, collection_name: str) -> None:
+        with self.lock:
+            self.generations[collection_name] = self.generations.get(collection_name, 0) + 1
+            for key in [key for key in self.entries if key[0] == collection_name]:
+                del self.entries[key]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": sum(len(entries) for entries in self.entries.values())}
@@ -0,0 +1,61 @@
+from cachetools import TTLCache
+import threading
+import uuid
+
+
+class ChatSessionManager:
+    """
+    Chat histories keyed by session ID, bounded in number (LRU), in idle time (TTL refreshed on each access)
+    and in size (oldest turns are dropped once the history exceeds max_history_tokens).
+    """
+    def __init__(self, model, max_sessions: int = 1000, idle_ttl: float = 1800, max_history_tokens: int = 4000) -> None:
+        self.model = model
+        self.max_history_tokens = max_history_tokens
+        self.sessions = TTLCache(maxsize=max_sessions, ttl=idle_ttl)
+        self.lock = threading.Lock()
+
+    def start_session(self) -> str:
+        session_id = str(uuid.uuid4())
+        with self.lock:
+            self.sessions[session_id] = []
+        return session_id
+
+    def get_history(self, session_id: str) -> list:
+        with self.lock:
+            history = self.sessions.get(session_id)
+            if history is None:
+                raise ValueError(f"Chat session '{session_id}' not found or expired. Call start_chat() first.")
+            # Réinsertion pour repousser l'expiration : le TTL compte le temps d'inactivité
+            self.sessions[session_id] = history
+            return list(history)
+
+    def send_message(self, session_id: str, message: str, stream: bool = False) -> str:
+        history = self.get_history(session_id)
+        chat_session = self.model.start_chat(history=history)
+        response = chat_session.send_message(message, stream=stream)
+        if stream:
+            response.resolve()
+        self.append_turn(session_id, message, response.text)
+        return response.text
+
+    def append_turn(self, session_id: str, message: str, answer: str) -> None:
+        with self.lock:
+            history = self.sessions.get(session_id)
+            if history is None:
+                return
+            history.append({"role": "user", "parts": [message]})
+            history.append({"role": "model", "parts": [answer]})
+            self.trim_history(history)
+
+    def trim_history(self, history: list) -> None:
+        # On retire les échanges les plus anciens (question + réponse) jusqu'à rentrer dans le budget
+        while len(history) > 2 and sum(self.estimate_tokens(turn) for turn in history) > self.max_history_tokens:
+            del history[:2]
+
+    @staticmethod
+    def estimate_tokens(turn: dict) -> int:
+        return sum(len(part) for part in turn["parts"]) // 4 + 1
+
+    def close_session(self, session_id: str) -> None:
+        with self.lock:
+            self.sessions.pop(session_id, None)
@@ -2,16 +2,20 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 from fastapi.responses import StreamingResponse
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import logging
+import binascii
+import base64
 
-from gemini.gemini_service import GeminiService
+# Import réservé au typage : le service (et ses dépendances lourdes) n'est chargé qu'au premier appel
+if TYPE_CHECKING:
+    from gemini.gemini_service import GeminiService
 
 # Configuration du logger pour le suivi des opérations et des erreurs
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-gemini_router = APIRouter()
+gemini_router = APIRouter(prefix="/gemini")
 
 class RagRequest(BaseModel):
     query: str
@@ -23,27 +27,33 @@ class QueryRequest(BaseModel):
     query: str
     context: str = "Pas de contexte pour cette requête, répond simplement à la question"
     stream: bool = False
+    # Image jointe à la requête, envoyée en base64 : le backend n'ouvre jamais un chemin fourni par l'appelant
+    image_base64: Optional[str] = None
+    image_mime_type: str = "image/png"
 
 class ChatMessageRequest(BaseModel):
     message: str
+    session_id: Optional[str] = None
     stream: bool = False
 
-def get_gemini_service(request: Request) -> GeminiService:
+def get_gemini_service(request: Request) -> "GeminiService":
     return request.state.injector.gemini_service
 
 @gemini_router.post("/generate_rag")
-async def generate_rag(request: RagRequest, service: GeminiService = Depends(get_gemini_service)):
+async def generate_rag(request: RagRequest, http_request: Request, service: "GeminiService" = Depends(get_gemini_service)):
     try:
         print(request)
-        context=None
         if request.collection_name:
-            context = await service.get_context(query=request.query, collection_name=request.collection_name)
-            print(f"CONTEXTE = {context}")
-        response_rag = service.get_response_stream(query=request.query, prompt_template=request.prompt_template, context=context, stream=request.stream)
+            response_rag = await service.get_rag_response_stream(query=request.query, collection_name=request.collection_name,
+                                                                 prompt_template=request.prompt_template,
+                                                                 is_disconnected=http_request.is_disconnected)
+        else:
+            response_rag = service.aget_response_stream(query=request.query, prompt_template=request.prompt_template, context=None,
+                                                        is_disconnected=http_request.is_disconnected)
         if request.stream:
             return StreamingResponse(response_rag, media_type="text/plain")
         else:
-            return {"response": response_rag}
+            return {"response": "".join([chunk async for chunk in response_rag])}
     except Exception as e:
         logger.error(f"Erreur lors de la génération de RAG : {e}")
         print(service.get_collection_names())
@@ -51,21 +61,25 @@ async def generate_rag(request: RagRequest, service: GeminiService = Depends(get
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur lors de la génération de RAG. : {e}")
 
 @gemini_router.post("/generate_stream")
-async def generate_response(request: QueryRequest, service: GeminiService = Depends(get_gemini_service)):
+async def generate_response(request: QueryRequest, http_request: Request, service: "GeminiService" = Depends(get_gemini_service)):
     try:
-        response_stream = service.get_response_stream(query=request.query, context=request.context, stream=request.stream)
-        print(type(response_stream))
-        print(response_stream)
+        response_stream = service.aget_response_stream(query=request.query, context=request.context,
+                                                       is_disconnected=http_request.is_disconnected)
         return StreamingResponse(response_stream, media_type="text/plain")
     except Exception as e:
         logger.error(f"Erreur lors de la génération de flux de réponse : {e}")
         raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la génération de flux de réponse.")
 
 @gemini_router.post("/generate")
-async def generate_response(request: QueryRequest, service: GeminiService = Depends(get_gemini_service)):
-    print(request)
+async def generate_response(request: QueryRequest, service: "GeminiService" = Depends(get_gemini_service)):
+    print(request.query)
+    try:
+        image_data = base64.b64decode(request.image_base64, validate=True) if request.image_base64 else None
+    except binascii.Error as e:
+        raise HTTPException(status_code=400, detail=f"Image base64 invalide : {e}")
     try:
-        response = service.get_response(query=request.query, context=request.context, stream=request.stream)
+        response = service.get_response(query=request.query, context=request.context, stream=request.stream,
+                                        image_data=image_data, image_mime_type=request.image_mime_type)
         print(response)
         return {"response": response}
     except Exception as e:
@@ -73,18 +87,18 @@ async def generate_response(request: QueryRequest, service: GeminiService = Depe
         raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la génération de réponse.")
 
 @gemini_router.post("/start_chat")
-async def start_chat(service: GeminiService = Depends(get_gemini_service)):
+async def start_chat(service: "GeminiService" = Depends(get_gemini_service)):
     try:
-        chat_session = service.start_chat()
-        return {"message": "Chat session started"}
+        session_id = service.start_chat()
+        return {"message": "Chat session started", "session_id": session_id}
     except Exception as e:
         logger.error(f"Erreur lors du démarrage de la session de chat : {e}")
         raise HTTPException(status_code=500, detail="Erreur interne du serveur lors du démarrage de la session de chat.")
 
 @gemini_router.post("/send_message")
-async def send_chat_message(request: ChatMessageRequest, service: GeminiService = Depends(get_gemini_service)):
+async def send_chat_message(request: ChatMessageRequest, service: "GeminiService" = Depends(get_gemini_service)):
     try:
-        response = service.send_chat_message(request.message, stream=request.stream)
+        response = service.send_chat_message(request.message, session_id=request.session_id, stream=request.stream)
         return {"response": response}
     except ValueError as ve:
         logger.error(f"Erreur de validation : {ve}")
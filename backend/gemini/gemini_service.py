@@ -1,27 +1,60 @@
 from injector import singleton, inject
-import pathlib
 
 import uuid
 import google.generativeai as genai
 from langchain.prompts import PromptTemplate
 from prompt.prompt_library import prompt_template_SPEC20, default_prompt
 from prompt.artworks_context import artwork_global_context
+from prompt.context_packer import ContextPacker, PackedContext
 from vectorstore.qdrant_service import QdrantService
+from gemini.answer_cache import SemanticAnswerCache
+from gemini.chat_session_manager import ChatSessionManager
+from metrics.metrics_service import (time_stage, record_cache, GEMINI_TTFT_SECONDS, GEMINI_STREAM_SECONDS,
+                                     GEMINI_GENERATED_TOKENS, GEMINI_STREAMS_IN_FLIGHT)
+from profiling.profiling_service import profile_stage, annotate_stage, start_stage, end_stage
 from langchain.schema.document import Document
 from google.cloud import firestore
+from cachetools import TTLCache
+import threading
+import asyncio
+import time
 
 
 import os
 @singleton
 class GeminiService:
     @inject
-    def __init__(self, qdrant_service: QdrantService, model_name='gemini-1.5-flash') -> None:
+    def __init__(self, qdrant_service: QdrantService, model_name='gemini-1.5-flash',
+                 answer_cache_threshold: float = 0.95, answer_cache_ttl: float = 3600,
+                 watch_artworks: bool = True, artwork_cache_ttl: float = 600,
+                 artwork_cache_size: int = 1024, artwork_context_timeout: float = 2.0,
+                 retrieval_timeout: float = 5.0, max_concurrent_streams: int = 32,
+                 max_chat_sessions: int = 1000, chat_idle_ttl: float = 1800,
+                 max_chat_history_tokens: int = 4000, context_max_tokens: int = 2000) -> None:
         self.model_name = model_name
         GOOGLE_API_KEY = os.getenv('GOOGLE_GEMINI_API_KEY')
         genai.configure(api_key=GOOGLE_API_KEY)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
         self.qdrant_service = qdrant_service
         self.db = self.initialize_firestore()
+        # Cache sémantique des réponses RAG, invalidé à la ré-ingestion de la collection
+        self.answer_cache = SemanticAnswerCache(similarity_threshold=answer_cache_threshold, ttl_seconds=answer_cache_ttl)
+        self.qdrant_service.add_collection_listener(self.on_collection_changed)
+        self.watch_artworks = watch_artworks
+        # Un seul listener Firestore (un flux RPC, un thread) pour toute la collection 'artworks'
+        self.artworks_watch = None
+        self.artworks_watch_lock = threading.Lock()
+        # collection_name -> (artwork_id, Document de contexte global déjà rendu)
+        self.artwork_cache = TTLCache(maxsize=artwork_cache_size, ttl=artwork_cache_ttl)
+        self.artwork_cache_lock = threading.Lock()
+        self.artwork_context_timeout = artwork_context_timeout
+        self.retrieval_timeout = retrieval_timeout
+        # Plafond de générations Gemini simultanées, les suivantes attendent leur tour
+        self.stream_semaphore = asyncio.Semaphore(max_concurrent_streams)
+        self.chat_sessions = ChatSessionManager(self.model, max_sessions=max_chat_sessions, idle_ttl=chat_idle_ttl,
+                                                max_history_tokens=max_chat_history_tokens)
+        # Contexte RAG compact et borné en tokens, au lieu du repr des Document
+        self.context_packer = ContextPacker(max_tokens=context_max_tokens)
         
     @staticmethod
     def initialize_firestore():
@@ -46,42 +79,162 @@ class GeminiService:
                 return doc.id
         raise ValueError(f"No artwork found with collection name {collection_name}")
 
+    def watch_artworks_collection(self):
+        # Écoute la collection 'artworks' pour invalider les caches de l'oeuvre modifiée, quel que soit son nombre
+        if not self.watch_artworks:
+            return
+        with self.artworks_watch_lock:
+            if self.artworks_watch is not None:
+                return
+            initial_snapshot = [True]
+
+            def on_artworks_snapshot(col_snapshot, changes, read_time):
+                # Le premier snapshot liste toutes les oeuvres existantes, pas des modifications
+                if initial_snapshot[0]:
+                    initial_snapshot[0] = False
+                    return
+                for change in changes:
+                    self.on_artwork_changed(change.document.id, (change.document.to_dict() or {}).get('collection_name'))
+
+            self.artworks_watch = self.db.collection('artworks').on_snapshot(on_artworks_snapshot)
+
+    def on_artwork_changed(self, artwork_id: str, collection_name: str = None):
+        # La collection peut avoir été renommée : on invalide aussi les entrées en cache de cet artwork_id
+        with self.artwork_cache_lock:
+            collection_names = {name for name, (cached_id, _) in list(self.artwork_cache.items()) if cached_id == artwork_id}
+        if collection_name:
+            collection_names.add(collection_name)
+        for name in collection_names:
+            self.on_collection_changed(name)
+
+    def on_collection_changed(self, collection_name: str):
+        self.answer_cache.invalidate(collection_name)
+        with self.artwork_cache_lock:
+            self.artwork_cache.pop(collection_name, None)
+
+    @staticmethod
+    def render_artwork_context(artwork) -> Document:
+        context_text = (
+            f"Voici la description de l'oeuvre: {artwork.description}\n\n"
+            f"Voici le contexte du musée: {artwork.museum.museum_context}\n\n"
+            f"Voici la biographie de l'artiste: {artwork.artist.artist_biography}"
+        )
+        return Document(page_content=context_text, metadata={})
+
     def get_global_artwork_context(self, artwork_id: str):
         try:
             artwork = self.get_artwork_by_id(artwork_id)
-            artwork_description = artwork.description
-            museum_context = artwork.museum.museum_context
-            artist_biography = artwork.artist.artist_biography
-
-            context_text = (
-                f"Voici la description de l'oeuvre: {artwork_description}\n\n"
-                f"Voici le contexte du musée: {museum_context}\n\n"
-                f"Voici la biographie de l'artiste: {artist_biography}"
-            )
-
-            artwork_context_document = Document(page_content=context_text, metadata={})
-            return artwork_context_document
+            return self.render_artwork_context(artwork)
         except ValueError as e:
             print(e)
             return Document(page_content=str(e), metadata={})
+
+    def get_cached_artwork_context(self, collection_name: str) -> Document:
+        with profile_stage("artwork_context"):
+            return self.load_artwork_context(collection_name)
+
+    def load_artwork_context(self, collection_name: str) -> Document:
+        with self.artwork_cache_lock:
+            cached = self.artwork_cache.get(collection_name)
+        record_cache("artwork_context", hit=cached is not None)
+        annotate_stage(cache_hit=cached is not None)
+        if cached is not None:
+            return cached[1]
+
+        with time_stage("firestore_lookup"):
+            self.watch_artworks_collection()
+            artwork_id = self.get_artwork_id_by_collection_name(collection_name=collection_name)
+            try:
+                artwork = self.get_artwork_by_id(artwork_id)
+            except ValueError as e:
+                print(e)
+                return Document(page_content=str(e), metadata={})
+        artwork_context = self.render_artwork_context(artwork)
+        with self.artwork_cache_lock:
+            self.artwork_cache[collection_name] = (artwork_id, artwork_context)
+        return artwork_context
         
-    async def get_context(self, query: str, collection_name: str):
-        context = []
-        artwork_id = self.get_artwork_id_by_collection_name(collection_name=collection_name)
-        artwork_context = self.get_global_artwork_context(artwork_id)
-        context_from_qdrant = await self.qdrant_service.get_relevant_documents_and_neighbor_from_collection(query=query, collection_name=collection_name)
-        context.append(artwork_context)
-        context.append(context_from_qdrant)
-        return context
+    async def get_context(self, query: str, collection_name: str) -> PackedContext:
+        with profile_stage("get_context"):
+            return await self.build_context(query=query, collection_name=collection_name)
+
+    async def build_context(self, query: str, collection_name: str) -> PackedContext:
+        # Firestore et Qdrant sont indépendants : on les lance en parallèle, chacun avec son timeout
+        artwork_stage = asyncio.wait_for(
+            asyncio.to_thread(self.get_cached_artwork_context, collection_name=collection_name),
+            timeout=self.artwork_context_timeout,
+        )
+        retrieval_stage = asyncio.wait_for(
+            self.qdrant_service.get_relevant_documents_and_neighbor_from_collection(query=query, collection_name=collection_name),
+            timeout=self.retrieval_timeout,
+        )
+        artwork_context, context_from_qdrant = await asyncio.gather(artwork_stage, retrieval_stage, return_exceptions=True)
+
+        if isinstance(artwork_context, Exception) and isinstance(context_from_qdrant, Exception):
+            raise context_from_qdrant
+        # Résultat partiel si une des deux étapes échoue ou dépasse son timeout
+        degraded = isinstance(artwork_context, Exception) or isinstance(context_from_qdrant, Exception)
+        if isinstance(artwork_context, Exception):
+            print(f"Contexte global de l'oeuvre indisponible pour '{collection_name}' : {artwork_context!r}")
+            artwork_context = Document(page_content="", metadata={})
+        if isinstance(context_from_qdrant, Exception):
+            print(f"Recherche Qdrant indisponible pour '{collection_name}' : {context_from_qdrant!r}")
+            context_from_qdrant = []
+
+        with time_stage("context_pack"):
+            context = self.context_packer.pack(context_from_qdrant, artwork_context=artwork_context)
+            context.degraded = degraded
+            annotate_stage(tokens=context.token_count, chunks=len(context.chunk_numbers), dropped=dict(context.dropped),
+                           degraded=degraded)
+            return context
     
+    async def get_rag_response_stream(self, query: str, collection_name: str, prompt_template: str = None,
+                                      is_disconnected=None):
+        with time_stage("query_embedding"):
+            query_embedding = await self.qdrant_service.embeddings.aembed_query(query)
+        generation = self.answer_cache.generation(collection_name)
+        with profile_stage("answer_cache_lookup"):
+            cached_chunks = self.answer_cache.lookup(collection_name, prompt_template, query_embedding)
+            annotate_stage(cache_hit=cached_chunks is not None)
+        record_cache("answer", hit=cached_chunks is not None)
+        if cached_chunks is not None:
+            return self.replay_answer(cached_chunks)
+
+        context = await self.get_context(query=query, collection_name=collection_name)
+        print(f"CONTEXTE ({context.token_count} tokens, chunks {context.chunk_numbers}, écartés {context.dropped}) = {context.text}")
+        response_stream = self.aget_response_stream(query=query, prompt_template=prompt_template, context=context.text,
+                                                     is_disconnected=is_disconnected)
+        if context.degraded:
+            # Réponse servie mais pas mise en cache : elle resterait dégradée pendant tout le TTL
+            return response_stream
+        return self.record_answer(response_stream, collection_name=collection_name, prompt_template=prompt_template,
+                                  query_embedding=query_embedding, generation=generation, is_disconnected=is_disconnected)
+
+    @staticmethod
+    async def replay_answer(chunks):
+        for chunk in chunks:
+            yield chunk
+
+    async def record_answer(self, response_stream, collection_name: str, prompt_template: str, query_embedding, generation: int,
+                            is_disconnected=None):
+        # Relaie le flux tel quel et ne met en cache que les réponses complètes et valides
+        chunks = []
+        async for chunk in response_stream:
+            chunks.append(chunk)
+            yield chunk
+        if is_disconnected is not None and await is_disconnected():
+            return
+        if chunks and "Pas de réponse valide générée." not in chunks:
+            self.answer_cache.store(collection_name, prompt_template, query_embedding, chunks, generation)
+
     async def get_rag_from_collection(self, collection_name: str, query: str, prompt_template: str = None, 
                                       context: str = default_prompt, stream: bool = False):
-        context = await self.qdrant_service.get_relevant_documents_and_neighbor_from_collection(query=query, collection_name=collection_name)
+        documents = await self.qdrant_service.get_relevant_documents_and_neighbor_from_collection(query=query, collection_name=collection_name)
+        context = self.context_packer.pack(documents).text
         response = self.get_response(query, context=context, prompt_template=prompt_template, stream=stream)
         return response
         
-    def get_response_stream(self, query: str, prompt_template: str = None, context: str = default_prompt, 
-                            stream: bool = False):
+    def build_prompt(self, query: str, prompt_template: str = None, context: str = default_prompt) -> str:
         final_prompt = query
         if prompt_template:
             import prompt.prompt_library as prompt_library
@@ -95,28 +248,88 @@ class GeminiService:
                 final_prompt = prompt.format(context=context, query=query)
             except AttributeError:
                 print(f"Le prompt '{prompt_template}' n'existe pas dans prompt_library")
+        return final_prompt
+
+    @staticmethod
+    def iter_response_texts(response):
+        if response._result and response._result.candidates:
+            for candidate in response._result.candidates:
+                if candidate.content.parts:
+                    yield ''.join(part.text for part in candidate.content.parts)
+        else:
+            yield "Pas de réponse valide générée."
+
+    def get_response_stream(self, query: str, prompt_template: str = None, context: str = default_prompt, 
+                            stream: bool = False):
+        final_prompt = self.build_prompt(query=query, prompt_template=prompt_template, context=context)
         
         response_generator = self.model.generate_content(final_prompt, stream=True)
         
         for response in response_generator:
-            if response._result and response._result.candidates:
-                for candidate in response._result.candidates:
-                    if candidate.content.parts:
-                        yield ''.join(part.text for part in candidate.content.parts)
-            else:
-                yield "Pas de réponse valide générée."
+            yield from self.iter_response_texts(response)
+
+    async def aget_response_stream(self, query: str, prompt_template: str = None, context: str = default_prompt,
+                                   is_disconnected=None):
+        """
+        Async counterpart of get_response_stream. Chunks are only pulled from Gemini when the consumer asks
+        for the next one, and generation is cancelled upstream as soon as the client goes away.
+        """
+        with time_stage("prompt_build"):
+            final_prompt = self.build_prompt(query=query, prompt_template=prompt_template, context=context)
+
+        # Étape ouverte sans ContextVar : elle couvre des yields du générateur
+        generate_stage = start_stage("gemini_generate")
+        async with self.stream_semaphore:
+            GEMINI_STREAMS_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            if generate_stage is not None:
+                generate_stage.meta["queued_ms"] = round((start - generate_stage.start) * 1000, 3)
+            first_token_at = None
+            generated_chars = 0
+            usage_tokens = None
+            try:
+                response_generator = await self.model.generate_content_async(final_prompt, stream=True)
+                try:
+                    async for response in response_generator:
+                        if is_disconnected is not None and await is_disconnected():
+                            print("Client déconnecté, arrêt de la génération")
+                            break
+                        usage_tokens = self.candidates_token_count(response) or usage_tokens
+                        for text in self.iter_response_texts(response):
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                GEMINI_TTFT_SECONDS.observe(first_token_at - start)
+                            generated_chars += len(text)
+                            yield text
+                finally:
+                    # Annule l'appel gRPC en cours pour ne pas continuer à générer (et à payer) dans le vide
+                    cancel = getattr(getattr(response_generator, "_iterator", None), "cancel", None)
+                    if callable(cancel):
+                        cancel()
+            finally:
+                GEMINI_STREAMS_IN_FLIGHT.dec()
+                GEMINI_STREAM_SECONDS.observe(time.perf_counter() - start)
+                # Nombre de tokens renvoyé par Gemini, sinon estimation à 4 caractères par token
+                GEMINI_GENERATED_TOKENS.observe(usage_tokens if usage_tokens is not None else generated_chars // 4)
+                end_stage(generate_stage,
+                          ttft_ms=round((first_token_at - start) * 1000, 3) if first_token_at is not None else None,
+                          tokens=usage_tokens if usage_tokens is not None else generated_chars // 4)
+
+    @staticmethod
+    def candidates_token_count(response):
+        usage_metadata = getattr(response, "usage_metadata", None)
+        return getattr(usage_metadata, "candidates_token_count", None) or None
         
     def get_response(self, query: str, prompt_template: str = None, context: str = "Pas de contexte pour cette requête, répond simplement à la question",
-                     stream: bool = False, image_path: str = None):
+                     stream: bool = False, image_data: bytes = None, image_mime_type: str = 'image/png'):
 
         contents = [query]
         
-        if image_path:
-            image_data = {
-                'mime_type': 'image/png',
-                'data': pathlib.Path(image_path).read_bytes()
-            }
-            contents.append(image_data)
+        if image_data:
+            contents.append({
+                'mime_type': image_mime_type,
+                'data': image_data
+            })
 
         if prompt_template:
             prompt = PromptTemplate(
@@ -129,15 +342,13 @@ class GeminiService:
         response = self.model.generate_content(contents=contents, stream=stream)
         return response.text
 
-    def start_chat(self):
-        self.chat_session = self.model.start_chat(history=[])
-        return self.chat_session
+    def start_chat(self) -> str:
+        return self.chat_sessions.start_session()
 
-    def send_chat_message(self, message: str, stream: bool = False):
-        if not hasattr(self, 'chat_session'):
+    def send_chat_message(self, message: str, session_id: str = None, stream: bool = False):
+        if not session_id:
             raise ValueError("Chat session not started. Call start_chat() first.")
-        response = self.chat_session.send_message(message, stream=stream)
-        return response
+        return self.chat_sessions.send_message(session_id, message, stream=stream)
     def get_collection_names(self):
         collection_names = self.qdrant_service.get_collections_names()
         return collection_names
@@ -1,19 +1,36 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Dict, Optional
+import time
 
-health_router = APIRouter()
+health_router = APIRouter(prefix="/health")
 
 class HealthResponse(BaseModel):
     status: str
+    ready: bool
+    startup_timings: Optional[Dict[str, float]] = None
+
+class LivenessResponse(BaseModel):
+    status: str
+    uptime_seconds: float
 
 @health_router.get("/", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     try:
-        # Vous pouvez ajouter ici des vérifications spécifiques, par exemple :
-        # - Vérification de la connexion à la base de données
-        # - Vérification de la disponibilité de services externes
-        # Pour l'instant, nous renvoyons simplement un statut "healthy"
-        return HealthResponse(status="healthy")
+        # Liveness : ne construit aucun service, répond même pendant le warm-up
+        injector = request.state.injector
+        return HealthResponse(status="healthy", ready=injector.is_ready(), startup_timings=dict(injector.startup_timings))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Service unavailable")
 
+@health_router.get("/live", response_model=LivenessResponse)
+async def liveness(request: Request):
+    # Le processus répond : aucune dépendance n'est sondée ici
+    return LivenessResponse(status="alive", uptime_seconds=round(time.monotonic() - request.state.injector.started_at, 3))
+
+@health_router.get("/ready")
+async def readiness(request: Request):
+    report = await request.state.injector.health_service.readiness()
+    # 503 pour que le load balancer retire le worker tant qu'une dépendance est absente ou trop lente
+    return JSONResponse(content=report, status_code=200 if report["ready"] else 503)
@@ -0,0 +1,90 @@
+from typing import Callable, Dict, Optional
+import asyncio
+import time
+import os
+
+
+DEFAULT_LATENCY_THRESHOLDS_MS = {
+    "qdrant": 250.0,
+    "firestore": 1000.0,
+    "embedding": 1000.0,
+    "llm": 2000.0,
+}
+
+
+class HealthService:
+    """
+    Readiness probes of the backend dependencies: Qdrant, Firestore, the embedding model and the Gemini client.
+    Each probe is timed against a latency threshold; results are cached for cache_ttl seconds and concurrent
+    readiness checks share the same probe run, so load balancer probes stay cheap. Probes never build a
+    service: a dependency whose service is not built yet (warm-up still running) is reported as not ready.
+    """
+    def __init__(self, global_injector, cache_ttl: float = 10.0, probe_timeout: float = 3.0,
+                 latency_thresholds_ms: Optional[Dict[str, float]] = None) -> None:
+        self.global_injector = global_injector
+        self.cache_ttl = cache_ttl
+        self.probe_timeout = probe_timeout
+        # Seuils surchargeables par variable d'environnement, ex. HEALTH_MAX_LATENCY_MS_QDRANT=100
+        self.latency_thresholds_ms = {
+            name: float(os.getenv(f"HEALTH_MAX_LATENCY_MS_{name.upper()}", threshold))
+            for name, threshold in DEFAULT_LATENCY_THRESHOLDS_MS.items()
+        }
+        self.latency_thresholds_ms.update(latency_thresholds_ms or {})
+        self.probes: Dict[str, Callable[[], None]] = {
+            "qdrant": self.probe_qdrant,
+            "firestore": self.probe_firestore,
+            "embedding": self.probe_embedding,
+            "llm": self.probe_llm,
+        }
+        self.cached_report = None
+        self.cached_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def built_service(self, name: str):
+        service = self.global_injector.services.get(name)
+        if service is None:
+            raise LookupError(f"{name} not initialized")
+        return service
+
+    def probe_qdrant(self):
+        self.built_service("qdrant_service").qdrant_client.get_collections()
+
+    def probe_firestore(self):
+        self.built_service("gemini_service").db.collection('artworks').limit(1).get()
+
+    def probe_embedding(self):
+        # Appel direct au modèle, sans passer par les caches d'embeddings
+        self.built_service("embedding_service").embeddings_model.embed_query("health")
+
+    def probe_llm(self):
+        # count_tokens valide la clé API et le modèle sans générer de tokens
+        self.built_service("gemini_service").model.count_tokens("health")
+
+    async def run_probe(self, name: str, probe: Callable[[], None]) -> dict:
+        threshold_ms = self.latency_thresholds_ms[name]
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(probe), timeout=self.probe_timeout)
+        except LookupError as e:
+            return {"status": "not_initialized", "latency_ms": None, "threshold_ms": threshold_ms, "error": str(e)}
+        except Exception as e:
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+            return {"status": "error", "latency_ms": latency_ms, "threshold_ms": threshold_ms, "error": repr(e)}
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        status = "ok" if latency_ms <= threshold_ms else "slow"
+        return {"status": status, "latency_ms": latency_ms, "threshold_ms": threshold_ms}
+
+    async def check(self) -> dict:
+        names = list(self.probes)
+        results = await asyncio.gather(*(self.run_probe(name, self.probes[name]) for name in names))
+        dependencies = dict(zip(names, results))
+        warmed_up = self.global_injector.is_ready()
+        ready = warmed_up and all(result["status"] == "ok" for result in dependencies.values())
+        return {"ready": ready, "warmed_up": warmed_up, "checked_at": time.time(), "dependencies": dependencies}
+
+    async def readiness(self) -> dict:
+        async with self.lock:
+            if self.cached_report is None or time.monotonic() - self.cached_at > self.cache_ttl:
+                self.cached_report = await self.check()
+                self.cached_at = time.monotonic()
+            return self.cached_report
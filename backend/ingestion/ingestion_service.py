@@ -0,0 +1,124 @@
+from injector import singleton, inject
+from typing import Callable, Iterable, Iterator, Optional
+import threading
+import queue
+
+from chunking.chunking_service import ChunkingService
+from vectorstore.qdrant_service import QdrantService
+
+
+class StageError:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class ThreadedStage:
+    """
+    Run the iterable in a background thread and hand its items over through a bounded queue,
+    so the producer never gets more than `maxsize` items ahead of the consumer.
+    The source iterable belongs to the producer thread: the consumer never closes it, it calls stop(),
+    which makes both the producer and a consumer blocked waiting for an item give up within `poll_interval`.
+    """
+    def __init__(self, items: Iterable, maxsize: int, poll_interval: float = 0.1) -> None:
+        self.items = items
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.poll_interval = poll_interval
+        self.stopped = threading.Event()
+        self.end_of_stage = object()
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        self.thread.start()
+
+    def put(self, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self) -> None:
+        try:
+            for item in self.items:
+                if not self.put(item):
+                    return
+        except BaseException as e:
+            self.put(StageError(e))
+        finally:
+            # Fermé dans le thread qui l'itère, jamais depuis le consommateur
+            close = getattr(self.items, "close", None)
+            if close is not None:
+                close()
+            self.put(self.end_of_stage)
+
+    def __iter__(self) -> Iterator:
+        while not self.stopped.is_set():
+            try:
+                item = self.queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            if item is self.end_of_stage:
+                return
+            if isinstance(item, StageError):
+                raise item.error
+            yield item
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@singleton
+class IngestionService:
+    """
+    Streaming ingestion: partition -> chunk -> clean metadata -> embed in fixed-size batches -> upsert in batches.
+    Each stage runs in its own thread connected by bounded queues, so memory stays flat regardless of
+    dossier size and the first batches are embedded while later pages are still being partitioned.
+    """
+    @inject
+    def __init__(self, chunking_service: ChunkingService, qdrant_service: QdrantService,
+                 batch_size: int = 32, queue_size: int = 4) -> None:
+        self.chunking_service = chunking_service
+        self.qdrant_service = qdrant_service
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def ingest(self, path: str, collection_name: str, progress_callback: Optional[Callable[[dict], None]] = None,
+               tenant: Optional[dict] = None, **chunking_kwargs) -> dict:
+        if not self.chunking_service.list_pdf_files(path):
+            raise FileNotFoundError(f"No PDF found at '{path}'")
+        # tenant : artwork_id / museum_id écrits dans le payload quand les oeuvres partagent une collection
+        upsert = self.qdrant_service.start_incremental_upsert(collection_name, tenant=tenant)
+
+        documents = ThreadedStage(self.chunking_service.iter_chunked_documents(path=path, **chunking_kwargs),
+                                  maxsize=self.batch_size * self.queue_size)
+        embedded_batches = ThreadedStage((upsert.embed(upsert.prepare(batch))
+                                          for batch in batched(documents, self.batch_size)),
+                                         maxsize=self.queue_size)
+
+        processed = 0
+        try:
+            for batch in embedded_batches:
+                upsert.write(batch)
+                processed += len(batch["added"]) + len(batch["changed"]) + batch["unchanged"]
+                if progress_callback is not None:
+                    progress_callback({"documents": processed, **upsert.counts})
+        finally:
+            # Fin normale ou erreur : les deux threads s'arrêtent d'eux-mêmes, sans qu'on ferme leurs générateurs
+            embedded_batches.stop()
+            documents.stop()
+
+        report = upsert.finish()
+        report["documents"] = processed
+        return report
+
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel
+from typing import List, TYPE_CHECKING
+import logging
+import binascii
+import base64
+
+# Import réservé au typage : le service (et ses dépendances lourdes) n'est chargé qu'au premier appel
+if TYPE_CHECKING:
+    from jobs.job_service import JobService
+
+logger = logging.getLogger(__name__)
+
+job_router = APIRouter()
+
+class PdfFile(BaseModel):
+    name: str
+    content_base64: str
+
+class IngestRequest(BaseModel):
+    # Les PDF voyagent dans la requête : le backend n'ouvre jamais un chemin fourni par l'appelant
+    files: List[PdfFile]
+    artwork: dict
+
+def get_job_service(request: Request) -> "JobService":
+    return request.state.injector.job_service
+
+def get_job_or_404(job_id: str, service: "JobService") -> dict:
+    job = service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} introuvable.")
+    return job
+
+@job_router.post("/ingest")
+def ingest(request: IngestRequest, service: "JobService" = Depends(get_job_service)):
+    # Handler synchrone (threadpool) : décodage et écriture des PDF sur disque hors de la boucle d'événements
+    try:
+        files = [(pdf_file.name, base64.b64decode(pdf_file.content_base64, validate=True)) for pdf_file in request.files]
+    except binascii.Error as e:
+        raise HTTPException(status_code=400, detail=f"PDF base64 invalide : {e}")
+    try:
+        job_id = service.submit_ingestion(files=files, artwork=request.artwork)
+        return {"job_id": job_id}
+    except ValueError as ve:
+        logger.error(f"Requête d'ingestion invalide : {ve}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"Erreur lors de la création du job d'ingestion : {e}")
+        raise HTTPException(status_code=500, detail="Erreur interne du serveur lors de la création du job d'ingestion.")
+
+@job_router.get("/ingest/{job_id}")
+async def get_ingest_status(job_id: str, service: "JobService" = Depends(get_job_service)):
+    job = get_job_or_404(job_id, service)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+@job_router.get("/ingest/{job_id}/progress")
+async def get_ingest_progress(job_id: str, service: "JobService" = Depends(get_job_service)):
+    job = get_job_or_404(job_id, service)
+    return {"job_id": job["id"], "status": job["status"], "progress": job["progress"]}
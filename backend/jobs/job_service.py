@@ -0,0 +1,157 @@
+from injector import singleton, inject
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import traceback
+import threading
+import shutil
+import sqlite3
+import json
+import time
+import uuid
+import os
+
+from gemini.gemini_service import GeminiService, Artwork
+from ingestion.ingestion_service import IngestionService
+
+
+@singleton
+class JobService:
+    """
+    Background ingestion jobs run by a worker pool. Job state is persisted in a local SQLite file,
+    so jobs still queued or running when the server stops are picked up again on the next start.
+    The uploaded PDFs of a job are kept under `<upload_dir>/<job_id>/` until the job ends.
+    """
+    @inject
+    def __init__(self, ingestion_service: IngestionService, gemini_service: GeminiService,
+                 db_path: str = "./data/jobs.sqlite3", max_workers: int = 2, max_attempts: int = 3,
+                 upload_dir: str = None) -> None:
+        self.ingestion_service = ingestion_service
+        self.gemini_service = gemini_service
+        self.db_path = db_path
+        self.upload_dir = os.path.abspath(upload_dir or os.getenv("INGEST_UPLOAD_DIR", "./data/uploads"))
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.initialize_db()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion-job")
+        self.resume_pending_jobs()
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def initialize_db(self):
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def update_job(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        for key in ("progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self.lock, self.connect() as connection:
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self.connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = json.loads(job["progress"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def job_upload_dir(self, job_id: str) -> str:
+        return os.path.join(self.upload_dir, job_id)
+
+    def submit_ingestion(self, files: List[Tuple[str, bytes]], artwork: dict) -> str:
+        if not files:
+            raise ValueError("Aucun PDF à ingérer")
+        # Seul le nom de base est gardé : un nom comme '../../x.pdf' ne sort pas du dossier du job
+        file_names = [os.path.basename(name) for name, _ in files]
+        invalid_names = [name for name in file_names if not name.endswith(".pdf") or name == ".pdf"]
+        if invalid_names:
+            raise ValueError(f"Fichiers non PDF : {invalid_names}")
+
+        job_id = str(uuid.uuid4())
+        pdf_path = self.job_upload_dir(job_id)
+        os.makedirs(pdf_path)
+        for file_name, (_, content) in zip(file_names, files):
+            with open(os.path.join(pdf_path, file_name), 'wb') as file:
+                file.write(content)
+        now = time.time()
+        payload = {"pdf_path": pdf_path, "artwork": artwork}
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, "ingestion", "queued", json.dumps(payload), now, now),
+            )
+        self.executor.submit(self.run_job, job_id)
+        return job_id
+
+    def resume_pending_jobs(self):
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        for row in rows:
+            print(f"Reprise du job d'ingestion {row['id']}")
+            self.update_job(row["id"], status="queued")
+            self.executor.submit(self.run_job, row["id"])
+
+    def run_job(self, job_id: str):
+        job = self.get_job(job_id)
+        if job is None:
+            return
+        while job["attempts"] < self.max_attempts:
+            job["attempts"] += 1
+            self.update_job(job_id, status="running", attempts=job["attempts"], error=None)
+            try:
+                result = self.run_ingestion(job_id, job["payload"])
+                self.update_job(job_id, status="succeeded", result=result, progress={"stage": "done", **result})
+                self.remove_uploads(job_id)
+                return
+            except Exception as e:
+                print(f"Erreur lors du job d'ingestion {job_id} (tentative {job['attempts']}) : {e}")
+                self.update_job(job_id, error=f"{e}\n{traceback.format_exc()}")
+                time.sleep(min(2 ** job["attempts"], 30))
+        self.update_job(job_id, status="failed")
+        self.remove_uploads(job_id)
+
+    def remove_uploads(self, job_id: str):
+        # Job terminé : ses PDF ne seront plus relus
+        shutil.rmtree(self.job_upload_dir(job_id), ignore_errors=True)
+
+    def run_ingestion(self, job_id: str, payload: dict) -> dict:
+        artwork = Artwork.from_dict(payload["artwork"])
+
+        self.update_job(job_id, progress={"stage": "firestore"})
+        doc_ref = self.gemini_service.db.collection('artworks').document(artwork.id)
+        doc_ref.set(artwork.to_dict(), merge=True)
+
+        self.update_job(job_id, progress={"stage": "ingestion", "documents": 0})
+        return self.ingestion_service.ingest(
+            path=payload["pdf_path"],
+            collection_name=artwork.collection_name,
+            tenant={"artwork_id": artwork.id, "museum_id": artwork.museum.id},
+            progress_callback=lambda progress: self.update_job(job_id, progress={"stage": "ingestion", **progress}),
+        )
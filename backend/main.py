@@ -1,29 +1,152 @@
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import threading
+import logging
+import time
+import os
 
 from gemini.gemini_router import gemini_router
 from health.health_router import health_router
-from gemini.gemini_service import GeminiService
-from vectorstore.qdrant_service import QdrantService
-from chunking.chunking_service import ChunkingService
-from embedding.embedding_service import EmbeddingService
+from jobs.job_router import job_router
+from metrics.metrics_router import metrics_router
+from metrics.metrics_middleware import MetricsMiddleware, track_request
+from profiling.profiling_middleware import ProfilingMiddleware
+
+logger = logging.getLogger(__name__)
 
 
 class GlobalInjector:
+    """
+    Services are built on first use rather than at import time, so uvicorn binds the port right away.
+    warm_up() builds them all in a background thread and runs a dummy query through the embedding model;
+    `ready` is set once it has succeeded. Build times (imports included, dependencies excluded) are kept
+    in startup_timings.
+    """
     def __init__(self):
-        self.chunking_service = ChunkingService()
-        self.embedding_service = EmbeddingService()
-        self.qdrant_service = QdrantService(embedding_service=self.embedding_service)
-        self.gemini_service = GeminiService(qdrant_service=self.qdrant_service)
+        self.services = {}
+        self.lock = threading.RLock()
+        self.startup_timings = {}
+        self.nested_seconds = 0.0
+        self.started_at = time.monotonic()
+        self.ready = threading.Event()
+        self.warmup_error = None
+
+    def get_service(self, name: str, factory):
+        service = self.services.get(name)
+        if service is not None:
+            return service
+        with self.lock:
+            if name not in self.services:
+                # Le temps passé à construire les dépendances est compté pour elles, pas pour ce service
+                outer_nested_seconds, self.nested_seconds = self.nested_seconds, 0.0
+                start = time.perf_counter()
+                try:
+                    self.services[name] = factory()
+                    elapsed = time.perf_counter() - start
+                    self.startup_timings[name] = round(elapsed - self.nested_seconds, 3)
+                finally:
+                    self.nested_seconds = outer_nested_seconds + time.perf_counter() - start
+                logger.info(f"Service {name} construit en {self.startup_timings[name]:.2f}s")
+            return self.services[name]
+
+    @property
+    def chunking_service(self):
+        def build():
+            from chunking.chunking_service import ChunkingService
+            return ChunkingService()
+        return self.get_service("chunking_service", build)
+
+    @property
+    def embedding_service(self):
+        def build():
+            from embedding.embedding_service import EmbeddingService
+            return EmbeddingService()
+        return self.get_service("embedding_service", build)
+
+    @property
+    def qdrant_service(self):
+        def build():
+            from vectorstore.qdrant_service import QdrantService
+            return QdrantService(embedding_service=self.embedding_service)
+        return self.get_service("qdrant_service", build)
+
+    @property
+    def gemini_service(self):
+        def build():
+            from gemini.gemini_service import GeminiService
+            return GeminiService(qdrant_service=self.qdrant_service)
+        return self.get_service("gemini_service", build)
+
+    @property
+    def ingestion_service(self):
+        def build():
+            from ingestion.ingestion_service import IngestionService
+            return IngestionService(chunking_service=self.chunking_service, qdrant_service=self.qdrant_service)
+        return self.get_service("ingestion_service", build)
+
+    @property
+    def job_service(self):
+        def build():
+            from jobs.job_service import JobService
+            return JobService(ingestion_service=self.ingestion_service, gemini_service=self.gemini_service,
+                              max_workers=int(os.getenv('INGESTION_WORKERS', 2)))
+        return self.get_service("job_service", build)
+
+    @property
+    def health_service(self):
+        def build():
+            from health.health_service import HealthService
+            return HealthService(global_injector=self,
+                                 cache_ttl=float(os.getenv('HEALTH_CACHE_TTL', 10)),
+                                 probe_timeout=float(os.getenv('HEALTH_PROBE_TIMEOUT', 3)))
+        return self.get_service("health_service", build)
+
+    def warm_up(self):
+        try:
+            start = time.perf_counter()
+            embedding_service = self.embedding_service
+            # Premier forward pass hors cache : les poids sont chargés et les noyaux initialisés avant le trafic
+            query_start = time.perf_counter()
+            embedding_service.embeddings_model.embed_query("warm-up")
+            self.startup_timings["embedding_warmup_query"] = round(time.perf_counter() - query_start, 3)
+            # gemini_service construit aussi qdrant_service ; job_service reprend les jobs interrompus au dernier arrêt
+            for name in ("gemini_service", "job_service"):
+                getattr(self, name)
+            self.startup_timings["warm_up"] = round(time.perf_counter() - start, 3)
+            self.ready.set()
+            logger.info(f"Backend prêt en {time.monotonic() - self.started_at:.2f}s : {self.startup_timings}")
+        except Exception as e:
+            self.warmup_error = e
+            logger.error(f"Erreur lors du warm-up du backend : {e}")
+
+    def start_warm_up(self) -> threading.Thread:
+        thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
 
 
 global_injector = GlobalInjector()
 
-def create_app(global_injector) -> FastAPI:
+def create_app(global_injector, warm_up: bool = True) -> FastAPI:
+    # Construit avant le warm-up : /health/ready le lit depuis la boucle d'événements, il ne doit jamais
+    # attendre le verrou de l'injecteur que le warm-up garde pendant le chargement du modèle d'embedding
+    global_injector.health_service
+
     async def bind_injector_to_request(request: Request) -> None:
         request.state.injector = global_injector
 
-    app = FastAPI(dependencies=[Depends(bind_injector_to_request)])
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Le warm-up tourne en tâche de fond : le serveur répond aux sondes de liveness pendant ce temps
+        if warm_up:
+            global_injector.start_warm_up()
+        yield
+
+    app = FastAPI(dependencies=[Depends(bind_injector_to_request), Depends(track_request)], lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
@@ -32,13 +155,27 @@ def create_app(global_injector) -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    
-    app.include_router(gemini_router, prefix="/gemini", tags=["gemini"])
-    app.include_router(health_router, prefix="/health")
+    app.add_middleware(MetricsMiddleware)
+    # Profilage par requête (en-tête X-Profile ou échantillonnage) : le middleware n'est monté que s'il est activé
+    # PROFILING_ENABLED autorise l'en-tête X-Profile, PROFILE_SAMPLE_RATE profile une fraction du trafic
+    profiling_enabled = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+    profile_sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    if profiling_enabled or profile_sample_rate > 0:
+        app.add_middleware(ProfilingMiddleware, sample_rate=profile_sample_rate, header_enabled=profiling_enabled,
+                           profile_dir=os.getenv('PROFILE_DIR', './data/profiles'),
+                           max_profiles=int(os.getenv('PROFILE_MAX_FILES', 1000)))
+
+    # Préfixes portés par les routers eux-mêmes : le path_format des routes (label des métriques) est complet
+    app.include_router(gemini_router, tags=["gemini"])
+    app.include_router(health_router)
+    app.include_router(job_router, tags=["ingest"])
+    app.include_router(metrics_router, tags=["metrics"])
 
     return app
 
-app = create_app(global_injector)
+# Les workers de partitionnement (spawn) réimportent ce module sous le nom __mp_main__ : pas de warm-up chez eux
+app = create_app(global_injector, warm_up=os.getenv('WARM_UP_ON_STARTUP', 'true').lower() != 'false'
+                 and __name__ != "__mp_main__")
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,59 @@
+from fastapi import Request
+import time
+
+from metrics.metrics_service import HTTP_REQUESTS_IN_FLIGHT, HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each request until its last body chunk, so streamed responses are
+    measured in full. Requests are labelled with their route template (e.g. /ingest/{job_id}), which
+    track_request() reads from the route Starlette matched, keeping label cardinality bounded.
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = scope["request_metrics"] = {"handler": None}
+        status = {"code": 500}
+        start = time.perf_counter()
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            handler = request_metrics["handler"]
+            if handler is not None:
+                HTTP_REQUESTS_IN_FLIGHT.labels(handler=handler).dec()
+            HTTP_REQUEST_SECONDS.labels(handler=handler or "unmatched", method=scope["method"],
+                                        status=status["code"]).observe(time.perf_counter() - start)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+
+
+async def track_request(request: Request) -> None:
+    # Dépendance globale de l'app : la requête est routée ici, on la compte comme en cours
+    request_metrics = request.scope.get("request_metrics")
+    if request_metrics is None or request_metrics["handler"] is not None:
+        return
+    # Starlette pose la route matchée dans le scope : son path_format est le template (/ingest/{job_id})
+    route = request.scope.get("route")
+    handler = getattr(route, "path_format", None) or "unmatched"
+    request_metrics["handler"] = handler
+    HTTP_REQUESTS_IN_FLIGHT.labels(handler=handler).inc()
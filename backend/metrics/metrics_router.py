@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from metrics.metrics_service import render_metrics
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics")
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+from profiling.profiling_service import profile_stage
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+# Registre propre à l'app : /metrics n'expose que les métriques artalk_*
+registry = CollectorRegistry()
+
+RAG_STAGE_SECONDS = Histogram(
+    "artalk_rag_stage_seconds",
+    "Duration of each RAG pipeline stage (firestore_lookup, query_embedding, qdrant_search, "
+    "neighbor_expansion, context_pack, prompt_build).",
+    ["stage"], buckets=DEFAULT_LATENCY_BUCKETS, registry=registry,
+)
+GEMINI_TTFT_SECONDS = Histogram(
+    "artalk_gemini_time_to_first_token_seconds", "Time from the Gemini call to its first streamed text.",
+    buckets=DEFAULT_LATENCY_BUCKETS, registry=registry)
+GEMINI_STREAM_SECONDS = Histogram(
+    "artalk_gemini_stream_duration_seconds", "Total duration of a Gemini response stream.",
+    buckets=DEFAULT_LATENCY_BUCKETS, registry=registry)
+GEMINI_GENERATED_TOKENS = Histogram(
+    "artalk_gemini_generated_tokens", "Tokens generated per Gemini response.", buckets=TOKEN_BUCKETS,
+    registry=registry)
+CACHE_REQUESTS_TOTAL = Counter(
+    "artalk_cache_requests_total", "Cache lookups by cache and result (hit/miss).", ["cache", "result"],
+    registry=registry)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "artalk_http_requests_in_flight", "HTTP requests currently being served, streaming included.", ["handler"],
+    registry=registry)
+GEMINI_STREAMS_IN_FLIGHT = Gauge(
+    "artalk_gemini_streams_in_flight", "Gemini generations currently holding a stream slot.", registry=registry)
+HTTP_REQUEST_SECONDS = Histogram(
+    "artalk_http_request_duration_seconds", "HTTP request duration until the last body chunk is sent.",
+    ["handler", "method", "status"], buckets=DEFAULT_LATENCY_BUCKETS, registry=registry,
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """
+    Time one RAG stage into artalk_rag_stage_seconds, and into the timing tree when the request is profiled.
+    """
+    with profile_stage(stage), RAG_STAGE_SECONDS.labels(stage=stage).time():
+        yield
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS_TOTAL.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
@@ -0,0 +1,174 @@
+from typing import Optional
+import threading
+import asyncio
+import random
+import json
+import time
+import os
+import io
+
+from profiling.profiling_service import RequestProfile, current_node, current_profile
+
+
+# Un seul profileur CPU actif à la fois dans le processus
+cpu_profiler_lock = threading.Lock()
+
+
+class CpuProfiler:
+    """
+    Optional CPU profile of a request: pyinstrument (sampling, async aware) when installed,
+    cProfile otherwise. cProfile hooks the event loop thread, not the request: its report times every
+    coroutine that ran on the loop while the request was in flight, and none of the work sent to threads.
+    stop() must run on the loop thread; report() only formats and can run in a worker thread.
+    """
+    def __init__(self) -> None:
+        try:
+            from pyinstrument import Profiler
+            self.kind = "pyinstrument"
+            self.profiler = Profiler(async_mode="enabled")
+        except ImportError:
+            import cProfile
+            self.kind = "cProfile"
+            self.profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.kind == "pyinstrument":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self) -> None:
+        if self.kind == "pyinstrument":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def report(self) -> dict:
+        if self.kind == "pyinstrument":
+            return {"profiler": self.kind, "report": self.profiler.output_text(unicode=True, show_all=False)}
+        import pstats
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(40)
+        return {"profiler": self.kind, "report": output.getvalue()}
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiling. A request is profiled when it carries the `X-Profile` header
+    (`1` for the timing tree, `cpu` to add a CPU profile) or when it falls in the sampled fraction of traffic.
+    The response gets an `X-Profile-Id` header and a `Server-Timing` header with the stages finished before
+    the response started; the full tree is written to `<profile_dir>/<id>.json` once the last body chunk is sent,
+    so streamed answers are profiled until the end. Reports are formatted and written off the event loop, and only
+    the `max_profiles` most recent files are kept.
+    """
+    def __init__(self, app, sample_rate: float = 0.0, profile_dir: str = "./data/profiles",
+                 header_enabled: bool = True, max_profiles: int = 1000) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        self.header_enabled = header_enabled
+        self.max_profiles = max_profiles
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+    def trigger(self, scope) -> Optional[str]:
+        if self.header_enabled:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    value = value.decode("latin-1").strip().lower()
+                    if value == "cpu":
+                        return "header-cpu"
+                    if value in ("1", "true", "yes"):
+                        return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def write(self, profile: RequestProfile) -> None:
+        path = os.path.join(self.profile_dir, f"{profile.id}.json")
+        try:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(profile.to_dict(), file, indent=2)
+        except OSError as e:
+            print(f"Erreur lors de l'écriture du profil {path} : {e}")
+
+    def rotate(self) -> None:
+        # Supprime les profils les plus anciens au-delà de max_profiles
+        profiles = []
+        for entry in os.scandir(self.profile_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    profiles.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    continue
+        profiles.sort()
+        for _, path in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def save(self, profile: RequestProfile, cpu_profiler: Optional[CpuProfiler]) -> None:
+        # Exécuté dans un thread : formatage pstats/pyinstrument, json.dump et rotation ne bloquent pas la boucle
+        if cpu_profiler is not None:
+            profile.cpu_profile = cpu_profiler.report()
+        self.write(profile)
+        self.rotate()
+
+    @staticmethod
+    def server_timing(profile: RequestProfile) -> bytes:
+        return ", ".join(f"{node.name};dur={(node.end - node.start) * 1000:.1f}"
+                         for node in profile.completed_stages()).encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        trigger = self.trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(f"{scope['method']} {scope['path']}", trigger=trigger)
+        profile.root.meta["started_at"] = time.time()
+        cpu_profiler = None
+        if trigger == "header-cpu":
+            if cpu_profiler_lock.acquire(blocking=False):
+                cpu_profiler = CpuProfiler()
+            else:
+                profile.root.meta["cpu_profile_skipped"] = "another CPU profile is running"
+        finished = False
+
+        async def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            profile.finish()
+            if cpu_profiler is not None:
+                # Les profileurs sont accrochés au thread de la boucle : on les arrête ici, le reste part en thread
+                try:
+                    cpu_profiler.stop()
+                finally:
+                    cpu_profiler_lock.release()
+            await asyncio.to_thread(self.save, profile, cpu_profiler)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.root.meta["status"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode("latin-1")))
+                server_timing = self.server_timing(profile)
+                if server_timing:
+                    headers.append((b"server-timing", server_timing))
+                message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                await finish()
+
+        profile_token = current_profile.set(profile)
+        node_token = current_node.set(profile.root)
+        if cpu_profiler is not None:
+            cpu_profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_node.reset(node_token)
+            current_profile.reset(profile_token)
+            await finish()
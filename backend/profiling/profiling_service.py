@@ -0,0 +1,113 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+import threading
+import time
+import uuid
+
+
+class ProfileNode:
+    def __init__(self, name: str, start: float, meta: Optional[dict] = None) -> None:
+        self.name = name
+        self.start = start
+        self.end = None
+        self.meta = meta or {}
+        self.children: List["ProfileNode"] = []
+
+    def to_dict(self, origin: float) -> dict:
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((self.end - self.start) * 1000, 3) if self.end is not None else None,
+        }
+        if self.meta:
+            node["meta"] = self.meta
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class RequestProfile:
+    """
+    Timing tree of one profiled request. The node currently open is tracked in a ContextVar, so stages run
+    concurrently (asyncio.gather, asyncio.to_thread) attach to the right parent.
+    """
+    def __init__(self, name: str, trigger: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.trigger = trigger
+        self.root = ProfileNode(name, time.perf_counter())
+        self.lock = threading.Lock()
+        self.cpu_profile = None
+
+    def add_child(self, parent: ProfileNode, name: str, meta: Optional[dict] = None) -> ProfileNode:
+        node = ProfileNode(name, time.perf_counter(), meta)
+        with self.lock:
+            parent.children.append(node)
+        return node
+
+    def finish(self) -> None:
+        self.root.end = time.perf_counter()
+
+    def completed_stages(self) -> List[ProfileNode]:
+        # Étapes terminées, à plat, dans l'ordre de démarrage (pour l'en-tête Server-Timing)
+        stages = []
+        pending = list(self.root.children)
+        while pending:
+            node = pending.pop(0)
+            if node.end is not None:
+                stages.append(node)
+            pending.extend(node.children)
+        return sorted(stages, key=lambda node: node.start)
+
+    def to_dict(self) -> dict:
+        report = {"id": self.id, "trigger": self.trigger, "tree": self.root.to_dict(self.root.start)}
+        if self.cpu_profile is not None:
+            report["cpu_profile"] = self.cpu_profile
+        return report
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+current_node: ContextVar[Optional[ProfileNode]] = ContextVar("current_node", default=None)
+
+
+@contextmanager
+def profile_stage(name: str, **meta) -> Iterator[Optional[ProfileNode]]:
+    """
+    Record a stage in the timing tree of the current request. Outside a profiled request this is a
+    single ContextVar lookup.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        yield None
+        return
+    node = profile.add_child(current_node.get() or profile.root, name, meta)
+    token = current_node.set(node)
+    try:
+        yield node
+    finally:
+        node.end = time.perf_counter()
+        current_node.reset(token)
+
+
+def start_stage(name: str, **meta) -> Optional[ProfileNode]:
+    """
+    Open a stage without making it the current node, for code that spans yields of an async generator
+    (a ContextVar cannot be reset safely there). Close it with end_stage().
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return None
+    return profile.add_child(current_node.get() or profile.root, name, meta)
+
+
+def end_stage(node: Optional[ProfileNode], **meta) -> None:
+    if node is not None:
+        node.meta.update(meta)
+        node.end = time.perf_counter()
+
+
+def annotate_stage(**meta) -> None:
+    # Ajoute des informations (TTFT, nombre de tokens...) à l'étape en cours si la requête est profilée
+    node = current_node.get()
+    if node is not None:
+        node.meta.update(meta)
@@ -0,0 +1,124 @@
+from typing import List, Optional
+import unicodedata
+import re
+
+from langchain.schema.document import Document
+
+
+# Chunks sans valeur pour le modèle : numéros de page, sommaires, mentions légales, liens seuls...
+DEFAULT_BOILERPLATE_PATTERNS = [
+    r"^(page\s*)?\d+(\s*(/|sur|of)\s*\d+)?$",
+    r"^(table des mati[eè]res|sommaire|table of contents)\b",
+    r"^(©|\(c\)|copyright)\b",
+    r"^tous droits r[ée]serv[ée]s",
+    r"^all rights reserved",
+    r"^(https?://|www\.)\S+$",
+]
+
+
+class PackedContext:
+    def __init__(self, text: str, token_count: int, chunk_numbers: List[int], dropped: dict,
+                 degraded: bool = False) -> None:
+        self.text = text
+        self.token_count = token_count
+        self.chunk_numbers = chunk_numbers
+        self.dropped = dropped
+        # Une étape (Firestore, Qdrant) a échoué ou dépassé son timeout : contexte partiel
+        self.degraded = degraded
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class ContextPacker:
+    """
+    Render the global artwork context and the retrieved chunks as compact prompt text.
+    Duplicates, boilerplate and near-empty chunks are dropped, then chunks are kept by decreasing
+    retrieval score until the token budget is spent and written back in chunk order.
+    """
+    def __init__(self, max_tokens: int = 2000, min_chunk_chars: int = 40, chars_per_token: float = 4.0,
+                 boilerplate_patterns: Optional[List[str]] = None) -> None:
+        self.max_tokens = max_tokens
+        self.min_chunk_chars = min_chunk_chars
+        self.chars_per_token = chars_per_token
+        patterns = DEFAULT_BOILERPLATE_PATTERNS if boilerplate_patterns is None else boilerplate_patterns
+        self.boilerplate_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    def estimate_tokens(self, text: str) -> int:
+        # Estimation grossière, sans appel au tokenizer Gemini
+        return int(len(text) / self.chars_per_token) + 1 if text else 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return " ".join(text.split())
+
+    @staticmethod
+    def compact(text: str) -> str:
+        # Regroupe les lignes coupées par la mise en page du PDF
+        return " ".join(text.split())
+
+    def is_boilerplate(self, text: str) -> bool:
+        return any(pattern.search(text) for pattern in self.boilerplate_patterns)
+
+    @staticmethod
+    def chunk_number(doc: Document) -> int:
+        try:
+            return int(doc.metadata.get("chunk_number"))
+        except (TypeError, ValueError):
+            return -1
+
+    @staticmethod
+    def score(doc: Document) -> float:
+        return float(doc.metadata.get("score") or 0.0)
+
+    def select_chunks(self, documents: List[Document], dropped: dict) -> List[tuple]:
+        seen_numbers = set()
+        seen_texts = set()
+        candidates = []
+        for doc in documents:
+            chunk_number = self.chunk_number(doc)
+            text = self.compact(doc.page_content)
+            normalized = self.normalize(text)
+            if chunk_number in seen_numbers or normalized in seen_texts:
+                dropped["duplicate"] += 1
+                continue
+            if len(text) < self.min_chunk_chars:
+                dropped["short"] += 1
+                continue
+            if self.is_boilerplate(normalized):
+                dropped["boilerplate"] += 1
+                continue
+            seen_numbers.add(chunk_number)
+            seen_texts.add(normalized)
+            candidates.append((chunk_number, self.score(doc), text))
+        return candidates
+
+    def pack(self, documents: List[Document], artwork_context: Optional[Document] = None) -> PackedContext:
+        dropped = {"duplicate": 0, "short": 0, "boilerplate": 0, "budget": 0}
+        sections = []
+        budget = self.max_tokens
+
+        artwork_text = self.compact(artwork_context.page_content) if artwork_context is not None else ""
+        if artwork_text:
+            # Le contexte global de l'oeuvre passe avant les chunks, tronqué s'il dépasse à lui seul le budget
+            artwork_text = artwork_text[:int(budget * self.chars_per_token)]
+            sections.append(f"[oeuvre] {artwork_text}")
+            budget -= self.estimate_tokens(sections[0])
+
+        kept = []
+        # Les chunks les mieux classés par la recherche sont servis en premier
+        for chunk_number, _, text in sorted(self.select_chunks(documents, dropped), key=lambda c: (-c[1], c[0])):
+            line = f"[chunk {chunk_number}] {text}"
+            cost = self.estimate_tokens(line)
+            if cost > budget:
+                dropped["budget"] += 1
+                continue
+            kept.append((chunk_number, line))
+            budget -= cost
+
+        kept.sort()
+        sections.extend(line for _, line in kept)
+        text = "\n".join(sections)
+        return PackedContext(text=text, token_count=self.estimate_tokens(text),
+                             chunk_numbers=[chunk_number for chunk_number, _ in kept], dropped=dropped)
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Les modules du backend s'importent depuis le dossier backend (ex. `from vectorstore.qdrant_service import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
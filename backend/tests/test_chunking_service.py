@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+import chunking.chunking_service as chunking_service_module
+from chunking.chunking_service import ChunkingService
+from unstructured.documents.elements import Text, Title
+
+
+def fake_partition(file_path: str, first_page: int, last_page: int, strategy: str, languages: list) -> list:
+    elements = []
+    for page in range(first_page, last_page + 1):
+        elements.append(Title(f"{os.path.basename(file_path)} section {page}"))
+        elements.append(Text(f"Texte de la page {page}."))
+    return elements
+
+
+def cache_files(cache_dir) -> list:
+    return sorted(os.listdir(cache_dir))
+
+
+@pytest.fixture
+def chunking_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunking_service_module, "partition_pdf_pages", fake_partition)
+    service = ChunkingService(max_workers=1, pages_per_task=2, chunk_cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(service, "probe_page_strategies",
+                        lambda file_path, strategy: {str(page): "fast" for page in range(1, 5)})
+    return service
+
+
+@pytest.fixture
+def pdf_files(tmp_path):
+    paths = []
+    for name in ("a.pdf", "b.pdf"):
+        path = tmp_path / name
+        path.write_bytes(f"contenu de {name}".encode())
+        paths.append(str(path))
+    return paths
+
+
+def test_file_chunks_are_cached_once_the_file_is_finished(chunking_service, pdf_files):
+    cache_dir = chunking_service.chunk_cache.cache_dir
+    chunks = chunking_service.iter_pdf_chunks(pdf_files)
+
+    _, first_chunk, _ = next(chunks)
+    # Le pdf en cours s'écrit dans un fichier temporaire, invisible pour les lecteurs
+    assert [name.endswith(".tmp") for name in cache_files(cache_dir)] == [True]
+
+    texts = [first_chunk.text] + [chunk.text for _, chunk, _ in chunks]
+    assert len(texts) > 1
+    assert [name.endswith(".jsonl.gz") for name in cache_files(cache_dir)] == [True, True]
+
+    cached_texts = [chunk.text for _, chunk, _ in chunking_service.iter_pdf_chunks(pdf_files)]
+    assert cached_texts == texts
+
+
+def test_interrupted_file_is_not_cached(chunking_service, pdf_files):
+    chunks = chunking_service.iter_pdf_chunks(pdf_files)
+    next(chunks)
+    chunks.close()
+
+    assert cache_files(chunking_service.chunk_cache.cache_dir) == []
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from benchmarks.serving_benchmark import FakeFirestore, FakeGenerativeModel
+from gemini.gemini_service import Artist, Artwork, GeminiService, Museum
+from tests.test_qdrant_service import FakeEmbeddingService, make_documents
+from vectorstore.qdrant_service import QdrantService
+
+
+class LocalGeminiService(GeminiService):
+    def __init__(self, db: FakeFirestore, model: FakeGenerativeModel, **kwargs) -> None:
+        self.local_db = db
+        super().__init__(**kwargs)
+        self.model = model
+
+    def initialize_firestore(self):
+        return self.local_db
+
+
+@pytest.fixture
+def db():
+    return FakeFirestore(latency_ms=0)
+
+
+def build_gemini_service(db, model=None, **kwargs):
+    qdrant_service = QdrantService(embedding_service=FakeEmbeddingService(), location=":memory:")
+    return LocalGeminiService(db=db, model=model or FakeGenerativeModel(), qdrant_service=qdrant_service, **kwargs)
+
+
+def add_artworks(db, count: int) -> list:
+    museum = Museum(name="Musée", museum_context="Contexte du musée")
+    artworks = [Artwork(title=f"Oeuvre {i}", artist=Artist(name="Artiste"), museum=museum, description=f"Description {i}")
+                for i in range(count)]
+    for artwork in artworks:
+        db.collection("artworks").document(artwork.id).set(artwork.to_dict())
+    return artworks
+
+
+class TrackedStream:
+    """
+    Streaming response shaped like the async Gemini one: iterated chunk by chunk and cancelled through _iterator.
+    """
+    def __init__(self, model: "TrackedModel") -> None:
+        self.model = model
+        self.chunks = FakeGenerativeModel.stream(model)
+        self._iterator = self
+        self.finished = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.finished:
+            raise StopAsyncIteration
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self.finish()
+            raise
+        self.model.produced += 1
+        return chunk
+
+    def finish(self) -> None:
+        if not self.finished:
+            self.finished = True
+            self.model.active -= 1
+
+    def cancel(self) -> None:
+        if not self.finished:
+            self.model.cancelled += 1
+        self.finish()
+
+
+class TrackedModel(FakeGenerativeModel):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(first_token_latency_ms=0, **kwargs)
+        self.produced = 0
+        self.cancelled = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.first_token_latency)
+        return TrackedStream(self)
+
+
+def test_one_listener_invalidates_the_changed_artwork(db):
+    gemini_service = build_gemini_service(db)
+    artworks = add_artworks(db, 3)
+    for artwork in artworks:
+        gemini_service.load_artwork_context(artwork.collection_name)
+
+    assert len(db.listeners) == 1
+    db.collection("artworks").document(artworks[0].id).set({"description": "Nouvelle description"}, merge=True)
+
+    assert artworks[0].collection_name not in gemini_service.artwork_cache
+    assert artworks[1].collection_name in gemini_service.artwork_cache
+    context = gemini_service.load_artwork_context(artworks[0].collection_name)
+    assert "Nouvelle description" in context.page_content
+    assert len(db.listeners) == 1
+
+
+@pytest.mark.parametrize("retrieval_fails, cached_answers", [(False, 1), (True, 0)])
+def test_answers_from_a_degraded_context_are_not_cached(db, monkeypatch, retrieval_fails, cached_answers):
+    model = FakeGenerativeModel(tokens=4, first_token_latency_ms=0, token_latency_ms=0)
+    gemini_service = build_gemini_service(db, model=model)
+    artwork = add_artworks(db, 1)[0]
+
+    async def retrieve(query: str, collection_name: str):
+        if retrieval_fails:
+            raise TimeoutError("Qdrant indisponible")
+        return make_documents(3)
+
+    monkeypatch.setattr(gemini_service.qdrant_service, "get_relevant_documents_and_neighbor_from_collection", retrieve)
+
+    async def ask():
+        response_stream = await gemini_service.get_rag_response_stream("Quel est le sujet ?", artwork.collection_name)
+        return [chunk async for chunk in response_stream]
+
+    assert asyncio.run(ask())
+    assert gemini_service.answer_cache.stats()["size"] == cached_answers
+
+
+def test_stream_stops_upstream_generation_when_the_client_disconnects(db):
+    model = TrackedModel(tokens=50, tokens_per_chunk=1, token_latency_ms=1)
+    gemini_service = build_gemini_service(db, model=model)
+    received = []
+
+    async def is_disconnected():
+        return len(received) >= 2
+
+    async def consume():
+        async for chunk in gemini_service.aget_response_stream("Question ?", context="Contexte",
+                                                                 is_disconnected=is_disconnected):
+            received.append(chunk)
+
+    asyncio.run(consume())
+    assert len(received) == 2
+    assert model.cancelled == 1
+    assert model.produced <= 3
+
+
+def test_stream_only_pulls_chunks_the_consumer_asks_for(db):
+    model = TrackedModel(tokens=50, tokens_per_chunk=1, token_latency_ms=1)
+    gemini_service = build_gemini_service(db, model=model)
+
+    async def slow_consumer():
+        response_stream = gemini_service.aget_response_stream("Question ?", context="Contexte")
+        await response_stream.__anext__()
+        # Sans backpressure, les 50 tokens seraient générés pendant cette pause
+        await asyncio.sleep(0.2)
+        produced_while_paused = model.produced
+        await response_stream.aclose()
+        return produced_while_paused
+
+    assert asyncio.run(slow_consumer()) == 1
+    assert model.cancelled == 1
+
+
+def test_concurrent_generations_are_capped(db):
+    model = TrackedModel(tokens=10, tokens_per_chunk=1, token_latency_ms=5)
+    gemini_service = build_gemini_service(db, model=model, max_concurrent_streams=2)
+
+    async def consume():
+        return [chunk async for chunk in gemini_service.aget_response_stream("Question ?", context="Contexte")]
+
+    async def run_all():
+        return await asyncio.gather(*(consume() for _ in range(6)))
+
+    answers = asyncio.run(run_all())
+    assert all(len(answer) == 10 for answer in answers)
+    assert model.max_active == 2
+    assert model.active == 0
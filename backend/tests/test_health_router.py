@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+import threading
+import time
+
+from fastapi.testclient import TestClient
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from main import GlobalInjector, create_app
+
+
+class SlowWarmUpInjector(GlobalInjector):
+    """
+    Injector whose embedding model takes `build_seconds` to load; the other services are stand-ins.
+    """
+    def __init__(self, build_seconds: float) -> None:
+        super().__init__()
+        self.build_seconds = build_seconds
+        self.build_started = threading.Event()
+
+    @property
+    def embedding_service(self):
+        def build():
+            self.build_started.set()
+            time.sleep(self.build_seconds)
+            return SimpleNamespace(embeddings_model=DeterministicFakeEmbedding(size=16))
+        return self.get_service("embedding_service", build)
+
+    @property
+    def gemini_service(self):
+        return self.get_service("gemini_service", SimpleNamespace)
+
+    @property
+    def job_service(self):
+        return self.get_service("job_service", SimpleNamespace)
+
+
+def test_probes_answer_while_warm_up_is_running():
+    injector = SlowWarmUpInjector(build_seconds=2.0)
+    with TestClient(create_app(injector)) as client:
+        assert injector.build_started.wait(timeout=5)
+
+        start = time.perf_counter()
+        ready = client.get("/health/ready")
+        live = client.get("/health/live")
+        elapsed = time.perf_counter() - start
+
+        assert not injector.is_ready()
+        assert ready.status_code == 503
+        assert ready.json()["dependencies"]["embedding"]["status"] == "not_initialized"
+        assert live.status_code == 200
+        assert elapsed < 1.0
@@ -0,0 +1,92 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from ingestion.ingestion_service import IngestionService, ThreadedStage
+from tests.test_qdrant_service import FakeEmbeddingService, make_documents
+from vectorstore.qdrant_service import IncrementalUpsert, QdrantService
+
+
+class FakeChunkingService:
+    def __init__(self, pdf_files: list, documents: list) -> None:
+        self.pdf_files = pdf_files
+        self.documents = documents
+
+    def list_pdf_files(self, path: str) -> list:
+        return self.pdf_files
+
+    def iter_chunked_documents(self, path: str, **kwargs):
+        for document in self.documents:
+            if isinstance(document, Exception):
+                raise document
+            yield document
+
+
+@pytest.fixture
+def qdrant_service():
+    qdrant_service = QdrantService(embedding_service=FakeEmbeddingService(), location=":memory:")
+    qdrant_service.upsert_collection(make_documents(3), collection_name="oeuvre")
+    return qdrant_service
+
+
+def test_ingest_without_pdf_keeps_existing_points(qdrant_service):
+    ingestion_service = IngestionService(chunking_service=FakeChunkingService([], []), qdrant_service=qdrant_service)
+
+    with pytest.raises(FileNotFoundError):
+        ingestion_service.ingest(path="", collection_name="oeuvre")
+    assert len(qdrant_service.get_point_ids("oeuvre")) == 3
+
+
+def test_ingest_without_chunks_keeps_existing_points(qdrant_service):
+    # PDF présents mais aucun chunk exploitable (partitionnement vide ou en échec)
+    chunking_service = FakeChunkingService(["oeuvre.pdf"], [])
+    ingestion_service = IngestionService(chunking_service=chunking_service, qdrant_service=qdrant_service)
+
+    with pytest.raises(ValueError):
+        ingestion_service.ingest(path="./oeuvre", collection_name="oeuvre")
+    assert len(qdrant_service.get_point_ids("oeuvre")) == 3
+
+
+def wait_for_threads(expected: int, timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while threading.active_count() > expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return threading.active_count()
+
+
+def test_threaded_stage_stop_ends_a_blocked_producer():
+    stage = ThreadedStage(itertools.count(), maxsize=2)
+    assert list(itertools.islice(stage, 3)) == [0, 1, 2]
+
+    stage.stop()
+    stage.thread.join(timeout=5)
+    assert not stage.thread.is_alive()
+
+
+def test_write_error_is_raised_and_stage_threads_end(qdrant_service, monkeypatch):
+    def failing_write(self, batch):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(IncrementalUpsert, "write", failing_write)
+    chunking_service = FakeChunkingService(["oeuvre.pdf"], make_documents(500))
+    ingestion_service = IngestionService(chunking_service=chunking_service, qdrant_service=qdrant_service,
+                                         batch_size=4, queue_size=2)
+    threads_before = threading.active_count()
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        ingestion_service.ingest(path="./oeuvre", collection_name="oeuvre")
+    assert wait_for_threads(threads_before) == threads_before
+    assert len(qdrant_service.get_point_ids("oeuvre")) == 3
+
+
+def test_chunking_error_is_raised_and_stage_threads_end(qdrant_service):
+    documents = make_documents(10) + [RuntimeError("partition failed")]
+    ingestion_service = IngestionService(chunking_service=FakeChunkingService(["oeuvre.pdf"], documents),
+                                         qdrant_service=qdrant_service, batch_size=4, queue_size=2)
+    threads_before = threading.active_count()
+
+    with pytest.raises(RuntimeError, match="partition failed"):
+        ingestion_service.ingest(path="./oeuvre", collection_name="oeuvre")
+    assert wait_for_threads(threads_before) == threads_before
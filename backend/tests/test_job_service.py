@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+import base64
+import time
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from benchmarks.serving_benchmark import FakeFirestore
+from gemini.gemini_service import Artwork
+from jobs.job_router import get_job_service, job_router
+from jobs.job_service import JobService
+
+
+class FakeIngestionService:
+    def __init__(self) -> None:
+        self.ingested = []
+
+    def ingest(self, path: str, collection_name: str, tenant: dict, progress_callback=None) -> dict:
+        self.ingested.append((path, sorted(os.listdir(path))))
+        return {"added": 1, "changed": 0, "unchanged": 0, "removed": 0}
+
+
+@pytest.fixture
+def job_service(tmp_path):
+    service = JobService(ingestion_service=FakeIngestionService(), gemini_service=SimpleNamespace(db=FakeFirestore(0)),
+                         db_path=str(tmp_path / "jobs.sqlite3"), upload_dir=str(tmp_path / "uploads"))
+    yield service
+    service.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def client(job_service):
+    app = FastAPI()
+    app.include_router(job_router)
+    app.dependency_overrides[get_job_service] = lambda: job_service
+    return TestClient(app)
+
+
+def pdf_file(name: str, content: bytes = b"%PDF-1.4") -> dict:
+    return {"name": name, "content_base64": base64.b64encode(content).decode("ascii")}
+
+
+def wait_for_job(job_service, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    job = job_service.get_job(job_id)
+    while job["status"] not in ("succeeded", "failed") and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = job_service.get_job(job_id)
+    return job
+
+
+def test_uploaded_pdfs_stay_in_the_job_directory(client, job_service):
+    response = client.post("/ingest", json={"files": [pdf_file("../../oeuvre.pdf"), pdf_file("notes.pdf")],
+                                            "artwork": Artwork(title="Oeuvre").to_dict()})
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    assert wait_for_job(job_service, job_id)["status"] == "succeeded"
+    assert job_service.ingestion_service.ingested == [(job_service.job_upload_dir(job_id), ["notes.pdf", "oeuvre.pdf"])]
+    # Job terminé : les PDF reçus sont supprimés
+    assert not os.path.exists(job_service.job_upload_dir(job_id))
+
+
+@pytest.mark.parametrize("body", [
+    {"files": [], "artwork": {}},
+    {"files": [pdf_file("oeuvre.txt")], "artwork": {}},
+    {"files": [{"name": "oeuvre.pdf", "content_base64": "pas du base64 !"}], "artwork": {}},
+])
+def test_invalid_uploads_are_rejected(client, job_service, body):
+    assert client.post("/ingest", json=body).status_code == 400
+    assert not os.path.exists(job_service.upload_dir) or os.listdir(job_service.upload_dir) == []
+
+
+def test_server_paths_are_not_accepted(client):
+    assert client.post("/ingest", json={"pdf_path": "/etc", "artwork": {}}).status_code == 422
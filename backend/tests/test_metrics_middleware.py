@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from metrics.metrics_middleware import MetricsMiddleware, track_request
+from metrics.metrics_router import metrics_router
+from metrics.metrics_service import HTTP_REQUEST_SECONDS, record_cache
+
+
+def build_app():
+    router = APIRouter(prefix="/ingest")
+
+    @router.get("/{job_id}/progress")
+    def progress(job_id: str):
+        return {"job_id": job_id}
+
+    app = FastAPI(dependencies=[Depends(track_request)])
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def handlers():
+    return {sample.labels["handler"] for metric in HTTP_REQUEST_SECONDS.collect() for sample in metric.samples}
+
+
+def test_requests_are_labelled_with_the_route_template():
+    client = TestClient(build_app())
+
+    # La valeur du paramètre égale un segment littéral du chemin
+    assert client.get("/ingest/ingest/progress").status_code == 200
+    assert client.get("/ingest/progress/progress").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    # Le registre est global : on ne regarde que les routes de cette app
+    assert {handler for handler in handlers() if handler.startswith(("/ingest", "/{"))} == {"/ingest/{job_id}/progress"}
+    assert "unmatched" in handlers()
+
+
+def test_label_values_are_escaped_in_the_exposition():
+    app = FastAPI()
+    app.include_router(metrics_router)
+    cache_name = 'cache "test"\\\n'
+    record_cache(cache_name, hit=True)
+
+    text = TestClient(app).get("/metrics").text
+    samples = [sample for family in text_string_to_metric_families(text) for sample in family.samples
+               if sample.name == "artalk_cache_requests_total"]
+    assert cache_name in {sample.labels["cache"] for sample in samples}
@@ -0,0 +1,41 @@
+import json
+import os
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiling.profiling_middleware import ProfilingMiddleware
+
+
+def build_app(profile_dir, max_profiles):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, profile_dir=str(profile_dir), max_profiles=max_profiles)
+    return app
+
+
+def test_profiles_are_saved_off_the_event_loop_and_rotated(tmp_path, monkeypatch):
+    save_threads = []
+    save = ProfilingMiddleware.save
+
+    def recording_save(self, profile, cpu_profiler):
+        save_threads.append(threading.current_thread())
+        save(self, profile, cpu_profiler)
+
+    monkeypatch.setattr(ProfilingMiddleware, "save", recording_save)
+
+    with TestClient(build_app(tmp_path, max_profiles=3)) as client:
+        loop_thread = client.portal.call(threading.current_thread)
+        profile_ids = [client.get("/ping", headers={"X-Profile": "cpu"}).headers["x-profile-id"]
+                       for _ in range(5)]
+
+    assert len(save_threads) == 5
+    assert loop_thread not in save_threads
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{profile_id}.json" for profile_id in profile_ids[-3:])
+    with open(tmp_path / f"{profile_ids[-1]}.json", encoding="utf-8") as file:
+        assert json.load(file)["cpu_profile"]["report"]
@@ -0,0 +1,36 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain.schema.document import Document
+import pytest
+
+from vectorstore.qdrant_service import QdrantService
+
+
+class FakeEmbeddingService:
+    def __init__(self) -> None:
+        self.query_embedder = DeterministicFakeEmbedding(size=16)
+
+
+def make_documents(count: int) -> list:
+    return [Document(page_content=f"chunk {i}", metadata={"source": "oeuvre.pdf", "chunk_number": str(i)})
+            for i in range(count)]
+
+
+@pytest.fixture
+def qdrant_service():
+    return QdrantService(embedding_service=FakeEmbeddingService(), location=":memory:")
+
+
+def test_upsert_removes_chunks_that_disappeared(qdrant_service):
+    qdrant_service.upsert_collection(make_documents(3), collection_name="oeuvre")
+    report = qdrant_service.upsert_collection(make_documents(2), collection_name="oeuvre")
+
+    assert report["removed"] == 1
+    assert len(qdrant_service.get_point_ids("oeuvre")) == 2
+
+
+def test_empty_upsert_keeps_existing_points(qdrant_service):
+    qdrant_service.upsert_collection(make_documents(3), collection_name="oeuvre")
+
+    with pytest.raises(ValueError):
+        qdrant_service.upsert_collection([], collection_name="oeuvre")
+    assert len(qdrant_service.get_point_ids("oeuvre")) == 3
@@ -9,19 +9,16 @@ from models import (
     initialize_firestore,
     add_artist_firebase,
     add_museum_firebase,
-    add_artwork_firebase,
     get_artist_biography,
     get_artist_by_name,
     get_museum_by_name,
     get_all_artists,
     get_all_museums,
     get_description_from_gemini,
-    create_collection,
+    submit_ingestion_job,
+    get_ingestion_job_progress,
     generate_qr_code
 )
-from embedding.embedding_service import EmbeddingService
-from vectorstore.qdrant_service import QdrantService
-from gemini.gemini_service import GeminiService
 import os
 
 # Custom CSS for better styling
@@ -65,23 +62,6 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %
 # Initialize Firestore
 db = initialize_firestore()
 
-@st.cache_resource
-def load_embedding_service():
-    return EmbeddingService()
-
-@st.cache_resource
-def load_qdrant_service(_embedding_service):
-    return QdrantService(embedding_service=_embedding_service)
-
-@st.cache_resource
-def load_gemini_service(_qdrant_service):
-    return GeminiService(qdrant_service=_qdrant_service)
-
-# Initialize services
-embedding_service = load_embedding_service()
-qdrant_service = load_qdrant_service(embedding_service)
-gemini_service = load_gemini_service(qdrant_service)
-
 # Add main title
 st.markdown('<p class="main-title">Artalk Web Interface for Artists</p>', unsafe_allow_html=True)
 
@@ -204,10 +184,12 @@ if st.button("Add Artwork"):
             description=description,
             ressources_path=st.session_state.pdf_path if 'pdf_path' in st.session_state else ""
         )
-        add_artwork_firebase(db, artwork)
-        create_collection(pdf_path=st.session_state.pdf_path, artwork=artwork)
+        # L'écriture Firestore et l'ingestion des PDF tournent en tâche de fond côté backend
+        job_id = submit_ingestion_job(pdf_path=st.session_state.pdf_path, artwork=artwork)
+        st.session_state.ingestion_job_id = job_id
+        st.session_state.ingestion_job_result = None
         qr_code_path = generate_qr_code(artwork=artwork)
-        st.success(f"Artwork '{st.session_state.artwork_title}' added successfully.")
+        st.success(f"Artwork '{st.session_state.artwork_title}' submitted (ingestion job {job_id}).")
         logging.debug(f"Artwork added: {artwork.to_dict()}")
         
         # Display the QR code
@@ -230,6 +212,38 @@ if st.button("Add Artwork"):
     except ValueError as e:
         logging.error(f"Error adding artwork: {e}")
         st.error(e)
+    except Exception as e:
+        logging.error(f"Error submitting the ingestion job: {e}")
+        st.error(f"Error submitting the ingestion job: {e}")
+
+# Follow the ingestion job of the last submitted artwork
+@st.fragment(run_every=1)
+def show_ingestion_job_progress(job_id):
+    # Seul ce fragment est réexécuté chaque seconde : le reste de la page reste utilisable pendant l'ingestion
+    try:
+        job = get_ingestion_job_progress(job_id)
+    except Exception as e:
+        logging.error(f"Error polling the ingestion job: {e}")
+        st.error(f"Error polling the ingestion job: {e}")
+        return
+    progress = job["progress"] or {}
+    stage = progress.get("stage", "queued")
+    if job["status"] in ("succeeded", "failed"):
+        st.session_state.ingestion_job_id = ""
+        st.session_state.ingestion_job_result = (job["status"], progress)
+        # Réexécution complète : le fragment n'est plus affiché et arrête de sonder le backend
+        st.rerun()
+    st.info(f"Ingestion job {job_id}: {job['status']} ({stage}, {progress.get('documents', 0)} chunks)")
+    st.progress({"firestore": 10, "ingestion": 50, "done": 100}.get(stage, 0))
+
+if st.session_state.get('ingestion_job_id'):
+    show_ingestion_job_progress(st.session_state.ingestion_job_id)
+elif st.session_state.get('ingestion_job_result'):
+    status, progress = st.session_state.ingestion_job_result
+    if status == "succeeded":
+        st.success(f"Ingestion job finished: {progress}")
+    else:
+        st.error("Ingestion job failed.")
 
 # Add an artist section
 st.markdown('<p class="header-title">Add an Artist</p>', unsafe_allow_html=True)
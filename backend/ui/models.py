@@ -1,20 +1,16 @@
+import mimetypes
+import base64
 import uuid
 import os
 import qrcode
+import requests
 import wikipediaapi
 from google.cloud import firestore
-from embedding.embedding_service import EmbeddingService
-from vectorstore.qdrant_service import QdrantService
-from gemini.gemini_service import GeminiService
-from chunking.chunking_service import ChunkingService
 
 from prompt.prompt_library import prompt_description_artwork_gemini_query
 
-# Initialisation des services
-embedding_service = EmbeddingService()
-chunking_service = ChunkingService()
-qdrant_service = QdrantService(embedding_service=embedding_service)
-gemini_service = GeminiService(qdrant_service=qdrant_service)
+# URL du backend : l'UI ne charge aucun modèle, Gemini et l'ingestion passent par son API
+BACKEND_URL = os.getenv('ARTALK_BACKEND_URL', 'http://localhost:8000')
 
 class Artist:
     def __init__(self, name: str = "NoArtistName", artist_biography: str = "NoArtistBiography", id: str = None):
@@ -118,21 +114,32 @@ def generate_qr_code(artwork: Artwork):
     return qr_code_path
 
 
-def create_collection(pdf_path, artwork: Artwork):
-    try:
-        # Get the chunked documents
-        documents = chunking_service.get_chunked_documents_from_pdf(path=pdf_path )
-        # Save documents
-        collection_name = artwork.title + ", " + artwork.artist.name
-        # chunking_service.save_chunked_documents_to_pickle(file_path=pdf_path, documents=documents, file_name=collection_name)
-        qdrant_service.create_collection(docs=documents, collection_name=collection_name)
-    except Exception as e:
-        print(f"Erreur lors de la création de la collection : {e}")
-    
+def encode_file(file_path):
+    with open(file_path, "rb") as file:
+        return base64.b64encode(file.read()).decode("ascii")
+
+def submit_ingestion_job(pdf_path, artwork: Artwork):
+    # Le backend écrit l'oeuvre dans Firestore puis indexe les PDF en tâche de fond.
+    # Les PDF sont envoyés dans la requête : l'UI et le backend ne partagent pas de système de fichiers
+    pdf_names = sorted(name for name in os.listdir(pdf_path) if name.endswith(".pdf"))
+    files = [{"name": name, "content_base64": encode_file(os.path.join(pdf_path, name))} for name in pdf_names]
+    response = requests.post(f"{BACKEND_URL}/ingest", json={"files": files, "artwork": artwork.to_dict()}, timeout=60)
+    response.raise_for_status()
+    return response.json()["job_id"]
+
+def get_ingestion_job_progress(job_id):
+    response = requests.get(f"{BACKEND_URL}/ingest/{job_id}/progress", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
 def get_description_from_gemini(image_path):
     query = prompt_description_artwork_gemini_query
-    description = gemini_service.get_response(query=query, context="Pas de contexte", image_path=image_path)
-    return description
+    image_mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+    response = requests.post(f"{BACKEND_URL}/gemini/generate",
+                             json={"query": query, "context": "Pas de contexte", "image_base64": encode_file(image_path),
+                                   "image_mime_type": image_mime_type}, timeout=120)
+    response.raise_for_status()
+    return response.json()["response"]
 def initialize_firestore():
     db = firestore.Client()
     return db
@@ -0,0 +1,97 @@
+from qdrant_client.http import models
+from typing import Optional
+
+
+class CollectionProfile:
+    """
+    Storage and search settings applied to the collections a deployment creates: vector quantization
+    (with rescoring on the original vectors), on-disk vectors/payload and HNSW parameters.
+    None leaves the Qdrant default in place.
+    """
+    def __init__(self, name: str, quantization: Optional[str] = None, quantization_always_ram: bool = True,
+                 on_disk_vectors: Optional[bool] = None, on_disk_payload: Optional[bool] = None,
+                 hnsw_m: Optional[int] = None, hnsw_ef_construct: Optional[int] = None, hnsw_ef: Optional[int] = None,
+                 rescore: bool = True, oversampling: Optional[float] = None) -> None:
+        if quantization not in (None, "scalar", "binary"):
+            raise ValueError(f"Unknown quantization '{quantization}'")
+        self.name = name
+        self.quantization = quantization
+        self.quantization_always_ram = quantization_always_ram
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_ef = hnsw_ef
+        self.rescore = rescore
+        self.oversampling = oversampling
+
+    def vectors_config(self, vector_size: int) -> models.VectorParams:
+        return models.VectorParams(size=vector_size, distance=models.Distance.COSINE, on_disk=self.on_disk_vectors)
+
+    def hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99,
+                                                       always_ram=self.quantization_always_ram)
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        quantization = None
+        if self.quantization is not None:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        if quantization is None and self.hnsw_ef is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+    def collection_kwargs(self) -> dict:
+        # Arguments communs à create_collection et Qdrant.from_documents
+        return {
+            "on_disk_payload": self.on_disk_payload,
+            "hnsw_config": self.hnsw_config(),
+            "quantization_config": self.quantization_config(),
+        }
+
+    def estimate_ram_bytes(self, vector_count: int, vector_size: int) -> int:
+        """
+        Rough RAM footprint of the vectors and the HNSW graph, payload excluded.
+        """
+        ram = 0 if self.on_disk_vectors else vector_count * vector_size * 4
+        if self.quantization_always_ram:
+            if self.quantization == "scalar":
+                ram += vector_count * vector_size
+            elif self.quantization == "binary":
+                ram += vector_count * vector_size // 8
+        # Liens HNSW : 2 * m voisins au niveau 0, ids sur 4 octets
+        ram += vector_count * 2 * (self.hnsw_m or 16) * 4
+        return ram
+
+
+COLLECTION_PROFILES = {
+    # Réglages par défaut de Qdrant : vecteurs float32 en RAM
+    "default": CollectionProfile("default"),
+    # int8 en RAM pour la recherche, float32 sur disque pour le rescoring : ~4x moins de RAM
+    "balanced": CollectionProfile("balanced", quantization="scalar", on_disk_vectors=True, hnsw_ef=128,
+                                  oversampling=1.5),
+    # 1 bit par dimension en RAM, tout le reste sur disque : beaucoup de musées sur un même noeud
+    "compact": CollectionProfile("compact", quantization="binary", on_disk_vectors=True, on_disk_payload=True,
+                                 hnsw_m=16, hnsw_ef_construct=100, hnsw_ef=128, oversampling=3.0),
+    # Graphe HNSW plus dense pour maximiser le rappel quand la RAM n'est pas un problème
+    "precise": CollectionProfile("precise", hnsw_m=32, hnsw_ef_construct=256, hnsw_ef=256),
+}
+
+
+def get_collection_profile(name: str) -> CollectionProfile:
+    try:
+        return COLLECTION_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of {sorted(COLLECTION_PROFILES)}")
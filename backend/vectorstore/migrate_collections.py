@@ -0,0 +1,112 @@
+"""
+Move per-artwork Qdrant collections into the shared collection layout.
+
+Points are copied with their vectors (nothing is re-embedded) and their payload gets the
+collection_name / artwork_id / museum_id fields used to filter the shared collection.
+Run from the backend directory:
+
+    python -m vectorstore.migrate_collections [--collections "Titre, Artiste" ...] [--delete-source]
+"""
+from qdrant_client.http import models
+from typing import List
+import argparse
+
+from embedding.embedding_service import EmbeddingService
+from vectorstore.qdrant_service import QdrantService
+
+
+def get_artwork_tenant(db, collection_name: str) -> dict:
+    results = db.collection('artworks').where('collection_name', '==', collection_name).limit(1).get()
+    for doc in results:
+        artwork = doc.to_dict()
+        return {"artwork_id": doc.id, "museum_id": artwork.get('museum', {}).get('id')}
+    print(f"Aucune oeuvre Firestore pour la collection '{collection_name}', migration sans artwork_id/museum_id")
+    return {}
+
+
+def migrate_collection(qdrant_service: QdrantService, collection_name: str, tenant: dict, batch_size: int = 256) -> int:
+    client = qdrant_service.qdrant_client
+    shared_collection_name = qdrant_service.shared_collection_name
+    vectors_config = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors_config, dict):
+        raise ValueError(f"Collection '{collection_name}' uses named vectors, which the shared layout does not support")
+    qdrant_service.create_empty_collection(shared_collection_name, vector_size=vectors_config.size)
+
+    migrated = 0
+    next_offset = None
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection_name,
+            offset=next_offset,
+            limit=batch_size,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            client.upsert(
+                collection_name=shared_collection_name,
+                points=[
+                    models.PointStruct(
+                        id=point.id,
+                        vector=point.vector,
+                        payload=qdrant_service.tenant_payload(point.payload, collection_name=collection_name, tenant=tenant),
+                    )
+                    for point in points
+                ],
+            )
+            migrated += len(points)
+        if not next_offset:
+            return migrated
+
+
+def migrate_collections(qdrant_service: QdrantService, collection_names: List[str] = None, db=None,
+                        delete_source: bool = False, batch_size: int = 256) -> dict:
+    client = qdrant_service.qdrant_client
+    shared_collection_name = qdrant_service.shared_collection_name
+    if collection_names is None:
+        collection_names = [collection.name for collection in client.get_collections().collections
+                            if collection.name != shared_collection_name]
+
+    report = {}
+    for collection_name in collection_names:
+        tenant = get_artwork_tenant(db, collection_name) if db is not None else {}
+        source_count = client.count(collection_name=collection_name, exact=True).count
+        migrated = migrate_collection(qdrant_service, collection_name, tenant=tenant, batch_size=batch_size)
+        target_count = client.count(collection_name=shared_collection_name,
+                                    count_filter=qdrant_service.tenant_filter(collection_name), exact=True).count
+        report[collection_name] = {"source": source_count, "migrated": migrated, "shared": target_count, **tenant}
+        print(f"Collection '{collection_name}' migrée : {report[collection_name]}")
+
+        # La collection d'origine n'est supprimée que si tous ses points sont bien dans la collection partagée
+        if delete_source and target_count >= source_count:
+            client.delete_collection(collection_name=collection_name)
+            print(f"Collection '{collection_name}' supprimée.")
+        elif delete_source:
+            print(f"Collection '{collection_name}' conservée : {target_count}/{source_count} points migrés.")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate per-artwork Qdrant collections into the shared collection.")
+    parser.add_argument("--url", default="http://localhost:6333/")
+    parser.add_argument("--shared-collection", default="artworks")
+    parser.add_argument("--collections", nargs="*", default=None, help="Collections to migrate (default: all)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each source collection once migrated")
+    parser.add_argument("--skip-firestore", action="store_true", help="Do not look up artwork_id/museum_id in Firestore")
+    args = parser.parse_args()
+
+    qdrant_service = QdrantService(embedding_service=EmbeddingService(), url=args.url,
+                                   collection_layout="shared", shared_collection_name=args.shared_collection)
+    db = None
+    if not args.skip_firestore:
+        from google.cloud import firestore
+        db = firestore.Client()
+
+    report = migrate_collections(qdrant_service, collection_names=args.collections, db=db,
+                                 delete_source=args.delete_source, batch_size=args.batch_size)
+    print(f"{len(report)} collection(s) migrée(s) vers '{args.shared_collection}'.")
+
+
+if __name__ == "__main__":
+    main()
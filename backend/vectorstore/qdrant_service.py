@@ -1,22 +1,63 @@
 from injector import singleton, inject
+from cachetools import LRUCache
 from langchain_qdrant import Qdrant
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
 from embedding.embedding_service import EmbeddingService
+from vectorstore.collection_profiles import CollectionProfile, get_collection_profile
+from metrics.metrics_service import time_stage
+from profiling.profiling_service import profile_stage, annotate_stage
 
-from typing import List
+from typing import List, Optional
 from langchain.schema.document import Document
 from langchain_core.embeddings.embeddings import Embeddings
 import uuid
+import hashlib
+import threading
 import docker
+import os
+
+# Champs de payload qui isolent les oeuvres entre elles dans la collection partagée
+TENANT_FIELDS = ("collection_name", "artwork_id", "museum_id")
 
 @singleton
 class QdrantService:
-    def __init__(self, embedding_service: EmbeddingService, url: str = "http://localhost:6333/") -> None:
+    def __init__(self, embedding_service: EmbeddingService, url: str = "http://localhost:6333/",
+                 neighbor_window: int = 1, max_cached_stores: int = 64, collection_layout: str = None,
+                 shared_collection_name: str = "artworks", collection_profile: str = None,
+                 location: str = None) -> None:
         self.url = url
-        self.embeddings = embedding_service.embedder
-        self.qdrant_client = QdrantClient(url=self.url)
-        self.client = docker.from_env()
-        self.ensure_container_running()
+        # ":memory:" : Qdrant embarqué dans le process, sans serveur ni conteneur docker, réservé aux benchmarks
+        # et aux tests qui le passent explicitement. Les clients synchrone et asynchrone ont chacun leur stockage
+        self.location = location
+        self.neighbor_window = neighbor_window
+        # "per_artwork" : une collection par oeuvre ; "shared" : une seule collection filtrée par payload
+        self.collection_layout = collection_layout or os.getenv("QDRANT_COLLECTION_LAYOUT", "per_artwork")
+        if self.collection_layout not in ("per_artwork", "shared"):
+            raise ValueError(f"Unknown collection layout '{self.collection_layout}'")
+        self.shared_collection_name = shared_collection_name
+        # Quantization, stockage disque et paramètres HNSW des collections créées (cf. collection_profiles)
+        self.collection_profile: CollectionProfile = get_collection_profile(
+            collection_profile or os.getenv("QDRANT_COLLECTION_PROFILE", "default"))
+        self.indexed_collections = set()
+        self.embeddings = embedding_service.query_embedder
+        self.qdrant_client = QdrantClient(**self.connection_kwargs())
+        # Client asynchrone partagé par toutes les requêtes (un seul canal gRPC multiplexé)
+        self.async_qdrant_client = AsyncQdrantClient(**self.connection_kwargs())
+        # Pool LRU des vector stores LangChain prêts à l'emploi, par collection
+        self.doc_stores = LRUCache(maxsize=max_cached_stores)
+        self.doc_stores_lock = threading.Lock()
+        # Callbacks appelés quand le contenu d'une collection change (ré-ingestion, suppression)
+        self.collection_listeners = []
+        self.client = None
+        if self.location is None:
+            self.client = docker.from_env()
+            self.ensure_container_running()
+
+    def connection_kwargs(self) -> dict:
+        if self.location is not None:
+            return {"location": self.location}
+        return {"url": self.url, "prefer_grpc": True}
 
     def ensure_container_running(self):
         container_name = "qdrant"
@@ -48,7 +89,10 @@ class QdrantService:
         except docker.errors.DockerException as e:
             print(f"Erreur lors du lancement du conteneur: {e}")
 
-    def create_collection(self, docs: List[Document], collection_name: str = str(uuid.uuid4())):       
+    def create_collection(self, docs: List[Document], collection_name: str = str(uuid.uuid4()), incremental: bool = False):       
+        if incremental or self.is_shared_layout():
+            # Dans la collection partagée, seul l'upsert incrémental sait remplacer les chunks d'une oeuvre
+            return self.upsert_collection(docs=docs, collection_name=collection_name)
         if self.qdrant_client.collection_exists(collection_name):
             print(f"Collection '{collection_name}' already exists.")
         else:
@@ -58,44 +102,281 @@ class QdrantService:
                 url=self.url,
                 prefer_grpc=True,
                 collection_name=collection_name,
+                on_disk=self.collection_profile.on_disk_vectors,
+                **self.collection_profile.collection_kwargs(),
             )
+            self.ensure_payload_indexes(collection_name)
             print(f"Collection '{collection_name}' created successfully.")
-        
-    def get_relevant_documents_from_collection(self, query: str, collection_name: str):
-        doc_store = Qdrant.from_existing_collection(
+            self.notify_collection_changed(collection_name)
+        self.invalidate_doc_store(collection_name)
+
+    def upsert_collection(self, docs: List[Document], collection_name: str, batch_size: int = 64,
+                          tenant: dict = None) -> dict:
+        """
+        Incremental ingestion of a list of documents, see IncrementalUpsert.
+        """
+        upsert = self.start_incremental_upsert(collection_name, tenant=tenant)
+        for start in range(0, len(docs), batch_size):
+            upsert.write(upsert.embed(upsert.prepare(docs[start:start + batch_size])))
+        return upsert.finish()
+
+    def start_incremental_upsert(self, collection_name: str, tenant: dict = None) -> "IncrementalUpsert":
+        return IncrementalUpsert(qdrant_service=self, collection_name=collection_name, tenant=tenant)
+
+    def is_shared_layout(self) -> bool:
+        return self.collection_layout == "shared"
+
+    def physical_collection_name(self, collection_name: str) -> str:
+        # Nom de la collection Qdrant qui contient réellement les chunks de l'oeuvre
+        return self.shared_collection_name if self.is_shared_layout() else collection_name
+
+    def tenant_conditions(self, collection_name: str, museum_id: str = None) -> List[models.FieldCondition]:
+        if not self.is_shared_layout():
+            return []
+        conditions = [models.FieldCondition(key="metadata.collection_name", match=models.MatchValue(value=collection_name))]
+        if museum_id is not None:
+            conditions.append(models.FieldCondition(key="metadata.museum_id", match=models.MatchValue(value=museum_id)))
+        return conditions
+
+    def tenant_filter(self, collection_name: str, museum_id: str = None) -> Optional[models.Filter]:
+        conditions = self.tenant_conditions(collection_name, museum_id=museum_id)
+        return models.Filter(must=conditions) if conditions else None
+
+    def tenant_payload(self, payload: dict, collection_name: str, tenant: dict = None) -> dict:
+        if not self.is_shared_layout():
+            return payload
+        tenant_metadata = {"collection_name": collection_name}
+        tenant_metadata.update({key: value for key, value in (tenant or {}).items()
+                                if key in TENANT_FIELDS and value is not None})
+        return {**payload, "metadata": {**payload["metadata"], **tenant_metadata}}
+
+    def create_empty_collection(self, collection_name: str, vector_size: int):
+        if self.qdrant_client.collection_exists(collection_name):
+            return
+        self.qdrant_client.create_collection(
             collection_name=collection_name,
-            embedding=self.embeddings,
-            path=None,
-            url=self.url,
+            vectors_config=self.collection_profile.vectors_config(vector_size),
+            **self.collection_profile.collection_kwargs(),
         )
+        self.indexed_collections.discard(collection_name)
+        self.ensure_payload_indexes(collection_name)
+        print(f"Collection '{collection_name}' created successfully.")
+
+    def apply_collection_profile(self, collection_name: str, profile: CollectionProfile = None):
+        """
+        Switch an existing collection to a profile. Qdrant rebuilds the quantized vectors and the HNSW
+        graph in the background, searches keep working meanwhile.
+        """
+        profile = profile or self.collection_profile
+        collection_name = self.physical_collection_name(collection_name)
+        self.qdrant_client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=profile.on_disk_vectors)},
+            hnsw_config=profile.hnsw_config(),
+            quantization_config=profile.quantization_config() or models.Disabled.DISABLED,
+            collection_params=models.CollectionParamsDiff(on_disk_payload=profile.on_disk_payload),
+        )
+        print(f"Profil '{profile.name}' appliqué à la collection '{collection_name}'.")
+
+    @staticmethod
+    def document_payload(doc: Document) -> dict:
+        # Même structure de payload que langchain_qdrant pour rester compatible avec la recherche
+        return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+    def get_point_ids(self, collection_name: str) -> set:
+        point_ids = set()
+        next_offset = None
+        while True:
+            points, next_offset = self.qdrant_client.scroll(
+                collection_name=self.physical_collection_name(collection_name),
+                scroll_filter=self.tenant_filter(collection_name),
+                offset=next_offset,
+                limit=1000,
+                with_payload=False,
+            )
+            point_ids.update(str(point.id) for point in points)
+            if not next_offset:
+                return point_ids
+
+    def add_collection_listener(self, listener):
+        self.collection_listeners.append(listener)
+
+    def notify_collection_changed(self, collection_name: str):
+        for listener in self.collection_listeners:
+            listener(collection_name)
+
+    def indexed_fields(self, physical_collection_name: str) -> List[str]:
+        # Index keyword sur metadata.chunk_number pour retrouver les voisins sans scroller la collection,
+        # et sur les champs d'oeuvre/musée pour filtrer la collection partagée
+        fields = ["metadata.chunk_number"]
+        if self.is_shared_layout() and physical_collection_name == self.shared_collection_name:
+            fields.extend(f"metadata.{field}" for field in TENANT_FIELDS)
+        return fields
+
+    def ensure_payload_indexes(self, physical_collection_name: str):
+        if physical_collection_name in self.indexed_collections:
+            return
+        for field_name in self.indexed_fields(physical_collection_name):
+            self.qdrant_client.create_payload_index(
+                collection_name=physical_collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        self.indexed_collections.add(physical_collection_name)
+
+    async def aensure_payload_indexes(self, physical_collection_name: str):
+        if physical_collection_name in self.indexed_collections:
+            return
+        for field_name in self.indexed_fields(physical_collection_name):
+            await self.async_qdrant_client.create_payload_index(
+                collection_name=physical_collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        self.indexed_collections.add(physical_collection_name)
+
+    def get_doc_store(self, collection_name: str) -> Qdrant:
+        collection_name = self.physical_collection_name(collection_name)
+        with self.doc_stores_lock:
+            doc_store = self.doc_stores.get(collection_name)
+            if doc_store is None:
+                doc_store = Qdrant(
+                    client=self.qdrant_client,
+                    collection_name=collection_name,
+                    embeddings=self.embeddings,
+                    async_client=self.async_qdrant_client,
+                )
+                self.doc_stores[collection_name] = doc_store
+            return doc_store
+
+    def invalidate_doc_store(self, collection_name: str):
+        with self.doc_stores_lock:
+            self.doc_stores.pop(self.physical_collection_name(collection_name), None)
+
+    def get_relevant_documents_from_collection(self, query: str, collection_name: str):
+        doc_store = self.get_doc_store(collection_name)
         
-        found_docs = doc_store.similarity_search(query, k=6)
-        return found_docs
+        found_docs = doc_store.similarity_search_with_score(query, k=6, filter=self.tenant_filter(collection_name),
+                                                            search_params=self.collection_profile.search_params())
+        return self.documents_with_scores(found_docs)
+
+    async def aget_relevant_documents_from_collection(self, query: str, collection_name: str):
+        doc_store = self.get_doc_store(collection_name)
+
+        found_docs = await doc_store.asimilarity_search_with_score(query, k=6, filter=self.tenant_filter(collection_name),
+                                                                   search_params=self.collection_profile.search_params())
+        return self.documents_with_scores(found_docs)
+
+    @staticmethod
+    def documents_with_scores(found_docs) -> List[Document]:
+        # Le score de similarité est gardé dans les métadonnées pour le tri du contexte
+        documents = []
+        for doc, score in found_docs:
+            doc.metadata["score"] = score
+            documents.append(doc)
+        return documents
     
     def delete_collection(self, collection_name: str):
-        self.qdrant_client.delete_collection(collection_name=collection_name)
-        
-    async def get_relevant_documents_and_neighbor_from_collection(self, query: str, collection_name: str):
-        all_documents = self.get_documents_from_collection(collection_name=collection_name)
-        retrieved_documents = self.get_relevant_documents_from_collection(query=query, collection_name=collection_name)
-        chunk_numbers = [int(doc.metadata["chunk_number"]) for doc in all_documents]
-        return_documents = list(retrieved_documents)  
-        
-        for doc in retrieved_documents:
-            chunk_number = int(doc.metadata["chunk_number"])
-            
-            if chunk_number > 0:
-                previous_docs = [document for document in all_documents if int(document.metadata["chunk_number"]) == chunk_number - 1]
-                return_documents.append(previous_docs[0])
-            
-            if chunk_number < max(chunk_numbers):
-                next_docs = [document for document in all_documents if int(document.metadata["chunk_number"]) == chunk_number + 1]
-                return_documents.append(next_docs[0])
+        if self.is_shared_layout():
+            # Seuls les points de l'oeuvre sont supprimés, la collection partagée reste en place
+            self.qdrant_client.delete(
+                collection_name=self.shared_collection_name,
+                points_selector=models.FilterSelector(filter=self.tenant_filter(collection_name)),
+            )
+        else:
+            self.qdrant_client.delete_collection(collection_name=collection_name)
+            self.indexed_collections.discard(collection_name)
+        self.invalidate_doc_store(collection_name)
+        self.notify_collection_changed(collection_name)
         
+    async def get_relevant_documents_and_neighbor_from_collection(self, query: str, collection_name: str, window: int = None):
+        with profile_stage("retrieval", collection=collection_name):
+            return await self.retrieve_documents_and_neighbors(query=query, collection_name=collection_name, window=window)
+
+    async def retrieve_documents_and_neighbors(self, query: str, collection_name: str, window: int = None):
+        with time_stage("qdrant_search"):
+            retrieved_documents = await self.aget_relevant_documents_from_collection(query=query, collection_name=collection_name)
+        with time_stage("neighbor_expansion"):
+            neighbor_documents = await self.aget_neighbor_documents(collection_name=collection_name,
+                                                                    documents=retrieved_documents,
+                                                                    window=window)
+        self.inherit_neighbor_scores(retrieved_documents, neighbor_documents, window=window)
+        return_documents = list(retrieved_documents) + neighbor_documents
+
         clean_documents = self.clean_document_retrieved(raw_documents=return_documents)
+        annotate_stage(hits=len(retrieved_documents), neighbors=len(neighbor_documents))
                 
         return clean_documents
 
+    def get_neighbor_documents(self, collection_name: str, documents: List[Document], window: int = None) -> List[Document]:
+        """
+        Fetch the chunks surrounding each document (chunk_number ± window) in a single filtered scroll.
+        """
+        neighbor_numbers = self.get_neighbor_chunk_numbers(documents=documents, window=window)
+        if not neighbor_numbers:
+            return []
+
+        physical_collection_name = self.physical_collection_name(collection_name)
+        self.ensure_payload_indexes(physical_collection_name)
+        points, _ = self.qdrant_client.scroll(
+            collection_name=physical_collection_name,
+            scroll_filter=self.chunk_number_filter(neighbor_numbers, tenant_conditions=self.tenant_conditions(collection_name)),
+            limit=len(neighbor_numbers),
+        )
+        return self.documents_from_points(points)
+
+    async def aget_neighbor_documents(self, collection_name: str, documents: List[Document], window: int = None) -> List[Document]:
+        neighbor_numbers = self.get_neighbor_chunk_numbers(documents=documents, window=window)
+        if not neighbor_numbers:
+            return []
+
+        physical_collection_name = self.physical_collection_name(collection_name)
+        await self.aensure_payload_indexes(physical_collection_name)
+        points, _ = await self.async_qdrant_client.scroll(
+            collection_name=physical_collection_name,
+            scroll_filter=self.chunk_number_filter(neighbor_numbers, tenant_conditions=self.tenant_conditions(collection_name)),
+            limit=len(neighbor_numbers),
+        )
+        return self.documents_from_points(points)
+
+    def get_neighbor_chunk_numbers(self, documents: List[Document], window: int = None) -> List[int]:
+        window = self.neighbor_window if window is None else window
+        retrieved_numbers = {int(doc.metadata["chunk_number"]) for doc in documents}
+        neighbor_numbers = set()
+        for chunk_number in retrieved_numbers:
+            for offset in range(1, window + 1):
+                neighbor_numbers.update((chunk_number - offset, chunk_number + offset))
+        return sorted(n for n in neighbor_numbers - retrieved_numbers if n >= 0)
+
+    def inherit_neighbor_scores(self, retrieved_documents: List[Document], neighbor_documents: List[Document],
+                                window: int = None):
+        # Un voisin hérite du meilleur score des chunks trouvés dont il est voisin
+        window = self.neighbor_window if window is None else window
+        for neighbor in neighbor_documents:
+            neighbor_number = int(neighbor.metadata["chunk_number"])
+            neighbor.metadata["score"] = max(
+                (doc.metadata.get("score", 0.0) for doc in retrieved_documents
+                 if abs(int(doc.metadata["chunk_number"]) - neighbor_number) <= window),
+                default=0.0,
+            )
+
+    @staticmethod
+    def chunk_number_filter(chunk_numbers: List[int], tenant_conditions: List[models.FieldCondition] = None) -> models.Filter:
+        # Les chunk_number sont stockés en str dans le payload (cf. ChunkingService)
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="metadata.chunk_number",
+                    match=models.MatchAny(any=[str(n) for n in chunk_numbers]),
+                ),
+                *(tenant_conditions or []),
+            ]
+        )
+
+    @staticmethod
+    def documents_from_points(points) -> List[Document]:
+        return [Document(page_content=point.payload['page_content'], metadata=point.payload['metadata'])
+                for point in points]
         
     def get_documents_from_collection(self, collection_name: str):        
         
@@ -103,27 +384,24 @@ class QdrantService:
         all_raw_documents = []
         limit = 100  # Nombre de documents à récupérer par requête
 
-        points, scroll_id = self.qdrant_client.scroll(
-            collection_name=collection_name,
+        points, next_offset = self.qdrant_client.scroll(
+            collection_name=self.physical_collection_name(collection_name),
+            scroll_filter=self.tenant_filter(collection_name),
             limit=limit,
         )
         
         all_raw_documents.extend(points)
 
-        while scroll_id:
-            points, scroll_id = self.qdrant_client.scroll(
-                collection_name=collection_name,
-                scroll=scroll_id,
+        while next_offset:
+            points, next_offset = self.qdrant_client.scroll(
+                collection_name=self.physical_collection_name(collection_name),
+                scroll_filter=self.tenant_filter(collection_name),
+                offset=next_offset,
                 limit=limit,
             )
             all_raw_documents.extend(points)
         
-        documents = []
-        for raw_doc in all_raw_documents:
-            page_content = raw_doc.payload['page_content']
-            metadata = raw_doc.payload['metadata']
-            doc = Document(page_content=page_content, metadata=metadata)
-            documents.append(doc)
+        documents = self.documents_from_points(all_raw_documents)
         
         clean_documents = self.clean_document_retrieved(raw_documents=documents)
         return clean_documents
@@ -141,10 +419,123 @@ class QdrantService:
         
         return sorted_documents
     
-    def get_collections_names(self):
+    def get_collections_names(self, museum_id: str = None):
+        if self.is_shared_layout():
+            return self.get_shared_collection_names(museum_id=museum_id)
+
         # Récupération des collections
         collections = self.qdrant_client.get_collections()
 
         # Extraction des noms des collections
         collection_names = [collection.name for collection in collections.collections]
         return collection_names
+
+    def get_shared_collection_names(self, museum_id: str = None, limit: int = 100000) -> List[str]:
+        # Les noms "logiques" des oeuvres sont les valeurs distinctes de metadata.collection_name
+        if not self.qdrant_client.collection_exists(self.shared_collection_name):
+            return []
+        self.ensure_payload_indexes(self.shared_collection_name)
+        museum_filter = None
+        if museum_id is not None:
+            museum_filter = models.Filter(must=[
+                models.FieldCondition(key="metadata.museum_id", match=models.MatchValue(value=museum_id))
+            ])
+        response = self.qdrant_client.facet(
+            collection_name=self.shared_collection_name,
+            key="metadata.collection_name",
+            facet_filter=museum_filter,
+            limit=limit,
+        )
+        return [hit.value for hit in response.hits]
+
+
+class IncrementalUpsert:
+    """
+    Incremental ingestion into one collection, batch by batch. Every chunk gets a stable ID derived from
+    its source and content hash, so only new chunks are embedded, chunks whose metadata moved
+    (e.g. chunk_number) get their payload rewritten, and chunks that disappeared are deleted by finish().
+    """
+    def __init__(self, qdrant_service: QdrantService, collection_name: str, tenant: dict = None) -> None:
+        self.qdrant_service = qdrant_service
+        self.client = qdrant_service.qdrant_client
+        self.collection_name = collection_name
+        # Collection Qdrant réellement écrite (la collection partagée selon le layout)
+        self.physical_collection_name = qdrant_service.physical_collection_name(collection_name)
+        self.tenant = tenant or {}
+        self.existing_ids = set()
+        if self.client.collection_exists(self.physical_collection_name):
+            qdrant_service.ensure_payload_indexes(self.physical_collection_name)
+            self.existing_ids = qdrant_service.get_point_ids(collection_name)
+        self.seen_ids = set()
+        self.occurrences = {}
+        self.counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+
+    def stable_point_id(self, doc: Document) -> str:
+        # ID = hash(collection, source, contenu) ; l'occurrence départage les chunks identiques d'un même fichier
+        content_hash = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+        key = (doc.metadata.get("source", ""), content_hash)
+        occurrence = self.occurrences.get(key, 0)
+        self.occurrences[key] = occurrence + 1
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.collection_name}|{key[0]}|{content_hash}|{occurrence}"))
+
+    def prepare(self, docs: List[Document]) -> dict:
+        point_ids = [self.stable_point_id(doc) for doc in docs]
+        self.seen_ids.update(point_ids)
+        known_ids = [point_id for point_id in point_ids if point_id in self.existing_ids]
+        existing_payloads = {}
+        if known_ids:
+            points = self.client.retrieve(collection_name=self.physical_collection_name, ids=known_ids, with_payload=True)
+            existing_payloads = {str(point.id): point.payload for point in points}
+
+        added, changed = [], []
+        for point_id, doc in zip(point_ids, docs):
+            payload = self.qdrant_service.tenant_payload(self.qdrant_service.document_payload(doc),
+                                                         collection_name=self.collection_name, tenant=self.tenant)
+            if point_id not in self.existing_ids:
+                added.append((point_id, doc.page_content, payload))
+            elif existing_payloads.get(point_id) != payload:
+                changed.append((point_id, payload))
+        return {"added": added, "changed": changed, "unchanged": len(docs) - len(added) - len(changed), "vectors": []}
+
+    def embed(self, batch: dict) -> dict:
+        if batch["added"]:
+            batch["vectors"] = self.qdrant_service.embeddings.embed_documents([text for _, text, _ in batch["added"]])
+        return batch
+
+    def write(self, batch: dict) -> None:
+        if batch["added"]:
+            self.qdrant_service.create_empty_collection(self.physical_collection_name, vector_size=len(batch["vectors"][0]))
+            self.client.upsert(
+                collection_name=self.physical_collection_name,
+                points=[models.PointStruct(id=point_id, vector=vector, payload=payload)
+                        for (point_id, _, payload), vector in zip(batch["added"], batch["vectors"])],
+            )
+        if batch["changed"]:
+            self.client.batch_update_points(
+                collection_name=self.physical_collection_name,
+                update_operations=[
+                    models.OverwritePayloadOperation(overwrite_payload=models.SetPayload(payload=payload, points=[point_id]))
+                    for point_id, payload in batch["changed"]
+                ],
+            )
+        self.counts["added"] += len(batch["added"])
+        self.counts["changed"] += len(batch["changed"])
+        self.counts["unchanged"] += batch["unchanged"]
+
+    def finish(self) -> dict:
+        if not self.seen_ids:
+            # Entrée vide (mauvais chemin, PDF illisibles) : on ne vide jamais une oeuvre par erreur
+            raise ValueError(f"No document ingested into collection '{self.collection_name}', "
+                             f"{len(self.existing_ids)} existing point(s) kept")
+        removed = list(self.existing_ids - self.seen_ids)
+        if removed:
+            self.client.delete(collection_name=self.physical_collection_name,
+                               points_selector=models.PointIdsList(points=removed))
+        self.counts["removed"] = len(removed)
+
+        report = dict(self.counts)
+        print(f"Collection '{self.collection_name}' mise à jour : {report}")
+        if report["added"] or report["changed"] or report["removed"]:
+            self.qdrant_service.invalidate_doc_store(self.collection_name)
+            self.qdrant_service.notify_collection_changed(self.collection_name)
+        return report